@@ -1,6 +1,6 @@
 from django.contrib import admin
-from reviews.models import (Category, Comment, Genre, Review, Title,
-                            TitleGenre, User)
+from reviews.models import (Category, Comment, Genre, OutgoingEmail, Review,
+                            Title, TitleGenre, User)
 
 # Register your models here.
 admin.site.register(User)
@@ -10,3 +10,4 @@ admin.site.register(Title)
 admin.site.register(TitleGenre)
 admin.site.register(Review)
 admin.site.register(Comment)
+admin.site.register(OutgoingEmail)
@@ -0,0 +1,128 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+from .cache import get_versions
+
+USER_KEY = 'api:auth:user:{}:{}'
+ROLE_CLAIM = 'role'
+SUPERUSER_CLAIM = 'is_superuser'
+ACCESS_VERSION_CLAIM = 'access_version'
+ISSUED_AT_CLAIM = 'iat'
+# Поля, от которых зависят права: их изменение меняет версию доступа.
+ACCESS_FIELDS = ('role', 'is_superuser', 'is_active')
+
+
+def user_resource(user_id):
+    return f'user:{user_id}'
+
+
+def access_resource(user_id):
+    return f'access:{user_id}'
+
+
+class RoleAccessToken(AccessToken):
+    """Access-токен с ролью пользователя и версией его прав."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[SUPERUSER_CLAIM] = user.is_superuser
+        [token[ACCESS_VERSION_CLAIM]] = get_versions(
+            (access_resource(user.pk),)
+        )
+        return token
+
+
+class TokenRoleUser(SimpleLazyObject):
+    """Пользователь, права которого известны из токена.
+
+    id, роль и is_superuser берутся из claims, поэтому проверки прав не
+    загружают пользователя; остальные атрибуты загружают его при первом
+    обращении.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+    is_user = User.is_user
+    is_admin = User.is_admin
+    is_moderator = User.is_moderator
+
+    def __init__(self, token, load_user):
+        super().__init__(load_user)
+        self.__dict__['token'] = token
+
+    @property
+    def id(self):
+        return self.token[api_settings.USER_ID_CLAIM]
+
+    pk = id
+
+    @property
+    def role(self):
+        return self.token[ROLE_CLAIM]
+
+    @property
+    def is_superuser(self):
+        return self.token[SUPERUSER_CLAIM]
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без чтения пользователя из базы.
+
+    С AUTH_TOKEN_CLAIMS = True права проверяются по токену, если в нём есть
+    роль, версия прав совпадает с текущей, а сам токен, если задан
+    AUTH_TOKEN_CLAIMS_MAX_AGE, выдан не раньше стольких секунд назад. Версия
+    прав — время в наносекундах и после вытеснения из кеша не повторится,
+    поэтому её проверки достаточно, чтобы отозвать роль. Сигналы и загрузка
+    CSV меняют версию при изменении роли, is_superuser, is_active и при
+    удалении пользователя, и тогда, как и для токенов без роли,
+    пользователь берётся из кеша. Ключ кеша строится из id пользователя и
+    версии ресурса user:<id>, которую сигналы меняют при любом сохранении.
+    Запись живёт AUTH_USER_CACHE_TIMEOUT секунд на случай изменений в
+    обход сигналов.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            # Ошибку для токена без id пользователя формирует simplejwt.
+            return super().get_user(validated_token)
+        if self.claims_trusted(validated_token):
+            return TokenRoleUser(
+                validated_token, lambda: self.get_cached_user(validated_token)
+            )
+        return self.get_cached_user(validated_token)
+
+    def claims_trusted(self, validated_token):
+        if (not settings.AUTH_TOKEN_CLAIMS
+                or ROLE_CLAIM not in validated_token):
+            return False
+        max_age = settings.AUTH_TOKEN_CLAIMS_MAX_AGE
+        issued_at = validated_token.get(ISSUED_AT_CLAIM)
+        if max_age is not None and (
+            issued_at is None or time.time() - issued_at > max_age
+        ):
+            return False
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        return validated_token.get(ACCESS_VERSION_CLAIM) == get_versions(
+            (access_resource(user_id),)
+        )[0]
+
+    def get_cached_user(self, validated_token):
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        versions = get_versions((user_resource(user_id), 'users'))
+        key = USER_KEY.format(
+            user_id, ':'.join(str(version) for version in versions)
+        )
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
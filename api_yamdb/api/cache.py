@@ -0,0 +1,106 @@
+"""Кеш ответов и условные GET-запросы по версиям ресурсов.
+
+У каждого ресурса (categories, genres, titles, reviews:<id произведения>,
+...) в кеше хранится версия. Ключ ответа и его ETag строятся из полного
+URL запроса и версий ресурсов, от которых ответ зависит, поэтому смена
+версии сигналом сразу делает все старые ответы недоступными, без перебора
+ключей. Версия — время в наносекундах: если сама версия вытеснена из
+кеша, новая не совпадёт со старой. Last-Modified не отдаётся: с точностью
+до секунды он пропустил бы изменения, сделанные в ту же секунду.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}'
+
+
+def get_versions(resources):
+    keys = [VERSION_KEY.format(resource) for resource in resources]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*resources):
+    """Меняет версии ресурсов после фиксации текущей транзакции."""
+    def bump():
+        cache.set_many({
+            VERSION_KEY.format(resource): time.time_ns()
+            for resource in resources
+        }, timeout=None)
+    transaction.on_commit(bump)
+
+
+def versions_digest(request, versions):
+    versions = ':'.join(str(version) for version in versions)
+    url = request.build_absolute_uri()
+    media_type = getattr(request, 'accepted_media_type', '')
+    return hashlib.md5(f'{versions}:{media_type}:{url}'.encode()).hexdigest()
+
+
+class ConditionalResponseMixin:
+    """ETag и ответ 304 без обращения к сериализатору.
+
+    cache_resources — ресурсы, изменение которых меняет ответ; с
+    cache_responses = True данные ответа ещё и кешируются.
+    """
+
+    cache_resources = ()
+    cache_responses = False
+
+    def get_cache_resources(self):
+        return self.cache_resources
+
+    def conditional_response(self, method, request, *args, **kwargs):
+        versions = get_versions(self.get_cache_resources())
+        digest = versions_digest(request, versions)
+        etag = quote_etag(digest)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.cached_response(
+                method, digest, request, *args, **kwargs
+            )
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+        return response
+
+    def cached_response(self, method, digest, request, *args, **kwargs):
+        if not self.cache_responses:
+            return method(request, *args, **kwargs)
+        key = RESPONSE_KEY.format(digest)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = method(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        return response
+
+
+class ConditionalListMixin(ConditionalResponseMixin):
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalResponseMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
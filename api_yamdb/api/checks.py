@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core import checks
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.security)
+def check_token_claims_cache(app_configs, **kwargs):
+    """Роль из токена отзывается только через общий кеш процессов."""
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.AUTH_TOKEN_CLAIMS and backend in LOCAL_CACHE_BACKENDS:
+        return [checks.Warning(
+            'AUTH_TOKEN_CLAIMS включён с локальным кешем процесса: при '
+            'нескольких процессах понижение роли не отзовёт права из уже '
+            'выданных токенов.',
+            hint='Настройте в CACHES общий кеш (Redis, Memcached).',
+            id='api.W001',
+        )]
+    return []
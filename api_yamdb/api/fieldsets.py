@@ -0,0 +1,130 @@
+"""Выборочные поля ответа: `?fields=id,name` и `?exclude=description`.
+
+Сериализатор верхнего уровня оставляет только запрошенные поля, а
+представление по ним же сужает запрос к базе: загружает только нужные
+колонки и пропускает select_related и prefetch_related для полей, которых
+нет в ответе. Параметры действуют только для GET- и HEAD-запросов, чтобы
+не менять набор полей при валидации записи.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import exceptions, serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def split_param(request, name):
+    value = request.query_params.get(name, '')
+    return [field for field in value.replace(' ', '').split(',') if field]
+
+
+class SparseFieldsMixin:
+    """Сериализатор, поля которого выбираются параметрами запроса."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        # Вложенные сериализаторы (category, genre) отдают все свои поля:
+        # параметры применяются только к объекту ответа или элементу списка.
+        top_level = self.parent is None or (
+            isinstance(self.parent, serializers.ListSerializer)
+            and self.parent.parent is None
+        )
+        if (request is None or request.method not in SAFE_METHODS
+                or not top_level):
+            return fields
+        only = split_param(request, FIELDS_PARAM)
+        exclude = split_param(request, EXCLUDE_PARAM)
+        unknown = set(only + exclude) - set(fields)
+        if unknown:
+            raise exceptions.ValidationError({
+                FIELDS_PARAM if set(only) & unknown else EXCLUDE_PARAM: (
+                    'Неизвестные поля: {}. Доступны: {}.'.format(
+                        ', '.join(sorted(unknown)), ', '.join(fields)
+                    )
+                )
+            })
+        if only:
+            fields = {name: fields[name] for name in fields if name in only}
+        for name in exclude:
+            fields.pop(name, None)
+        return fields
+
+
+def related_paths(select_related, prefix=''):
+    """Пути select_related из вложенного словаря query.select_related."""
+    for name, nested in select_related.items():
+        path = prefix + name
+        yield path
+        yield from related_paths(nested, path + LOOKUP_SEP)
+
+
+def source_names(fields):
+    """Атрибуты модели, из которых читают поля сериализатора.
+
+    None, если какое-то поле читает весь объект (source='*').
+    """
+    names = set()
+    for field in fields.values():
+        if field.source == '*':
+            return None
+        names.add(field.source_attrs[0])
+    return names
+
+
+class SparseQuerysetMixin:
+    """Сужает queryset представления до полей сериализатора ответа.
+
+    sparse_required_fields — поля модели, которые нужны независимо от
+    ответа, например для курсорной пагинации.
+    """
+
+    sparse_required_fields = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS or not (
+            self.request.query_params.get(FIELDS_PARAM)
+            or self.request.query_params.get(EXCLUDE_PARAM)
+        ):
+            return queryset
+        serializer = self.get_serializer()
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        names = source_names(serializer.fields)
+        if names is None:
+            return queryset
+        return self.project_queryset(
+            queryset, names | set(self.sparse_required_fields)
+        )
+
+    def project_queryset(self, queryset, names):
+        model = queryset.model
+        columns = []
+        for name in names:
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Свойство или аннотация: колонки не сужаются.
+                return queryset
+            if field.concrete and not field.many_to_many:
+                columns.append(name)
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            paths = [
+                path for path in related_paths(select_related)
+                if path.split(LOOKUP_SEP)[0] in names
+            ]
+            queryset = queryset.select_related(None)
+            # select_related() без аргументов присоединил бы все связи.
+            if paths:
+                queryset = queryset.select_related(*paths)
+        prefetch_related = queryset._prefetch_related_lookups
+        queryset = queryset.prefetch_related(None).prefetch_related(*(
+            lookup for lookup in prefetch_related
+            if getattr(lookup, 'prefetch_to', lookup).split(LOOKUP_SEP)[0]
+            in names
+        ))
+        return queryset.only(model._meta.pk.name, *columns)
@@ -1,6 +1,10 @@
+from django.db.models import F, Value
+from django.db.models.functions import Upper
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 
 from reviews.models import Title
+from reviews.search import search_titles
 
 
 class TitleFilter(filters.FilterSet):
@@ -12,12 +16,69 @@ class TitleFilter(filters.FilterSet):
         field_name='genre__slug'
     )
     name = filters.CharFilter(
-        field_name='name', lookup_expr='iexact'
+        field_name='name', method='filter_name'
     )
     year = filters.NumberFilter(
         field_name='year'
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = '__all__'
+
+    def filter_name(self, queryset, name, value):
+        """Регистронезависимое совпадение по индексу UPPER(name)."""
+        return queryset.alias(name_upper=Upper(name)).filter(
+            name_upper=Upper(Value(value))
+        )
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию, описанию, категории и жанрам,
+        сначала самые релевантные."""
+        return search_titles(queryset, value)
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """Сортировка произведений по индексированным столбцам.
+
+    reviews_count — синоним rating_count. Произведения без рейтинга
+    всегда в конце. Если среди ключей нет уникального, последним
+    добавляется id в направлении последнего ключа, чтобы страницы не
+    пересекались.
+    """
+
+    aliases = {'reviews_count': 'rating_count'}
+    nulls_last = ('rating',)
+    unique_fields = ('id', 'name')
+
+    def filter_queryset(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and (
+            queryset.ordered
+        ):
+            # Порядок уже задан фильтром, например релевантностью поиска.
+            return queryset
+        return super().filter_queryset(request, queryset, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        return self.translate(ordering) if ordering else ordering
+
+    def translate(self, ordering):
+        result = []
+        for term in ordering:
+            descending = term.startswith('-')
+            field = term.lstrip('-')
+            field = self.aliases.get(field, field)
+            if field in self.nulls_last:
+                expression = F(field)
+                result.append(
+                    expression.desc(nulls_last=True) if descending
+                    else expression.asc(nulls_last=True)
+                )
+            else:
+                result.append(f'-{field}' if descending else field)
+        fields = [term.lstrip('-') for term in ordering]
+        if not set(fields) & set(self.unique_fields):
+            result.append('-id' if ordering[-1].startswith('-') else 'id')
+        return result
@@ -0,0 +1,44 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PubDateCursorPagination(CursorPagination):
+    """Курсорная пагинация по (pub_date, id) от новых к старым."""
+
+    ordering = ('-pub_date', '-id')
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """Постраничная пагинация с переключением в курсорный режим.
+
+    Курсорный режим включается параметром `?pagination=cursor` (или
+    переданным `cursor`): страница выбирается по индексу без OFFSET,
+    а COUNT(*) не выполняется.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_pagination_class = PubDateCursorPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
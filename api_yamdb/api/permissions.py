@@ -49,7 +49,7 @@ class IsOwner(permissions.BasePermission):
         """Определяет права на уровне запроса и пользователя."""
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.id
             or request.user.is_moderator
             or request.user.is_admin
         )
@@ -1,16 +1,34 @@
 import datetime as dt
 
-from rest_framework import exceptions, serializers
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.validators import validate_username
+
+from api_yamdb.middleware import serializer_timer
+
+from .fieldsets import SparseFieldsMixin
 
 
 RESERVED_NAME = 'me'
 MESSAGE_FOR_RESERVED_NAME = 'Имя пользователя "me" использовать нельзя!'
 MESSAGE_FOR_USER_NOT_FOUND = 'Пользователя с таким именем нет!'
+MESSAGE_FOR_TAKEN_USERNAME = 'Username занят.'
+MESSAGE_FOR_TAKEN_EMAIL = 'Этот адрес электроной почты уже используется'
+
+
+class TimedSerializerMixin:
+    """Учитывает время сериализации в метриках запроса."""
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, TimedSerializerMixin,
+                         serializers.ModelSerializer):
     """Сериалайзер для Категорий."""
 
     class Meta:
@@ -20,7 +38,8 @@ class CategorySerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                      serializers.ModelSerializer):
     """Сериалайзер для Жанров."""
 
     class Meta:
@@ -30,7 +49,8 @@ class GenreSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                          serializers.ModelSerializer):
     """Сериалайзер для  чтения Тайтлов."""
 
     category = CategorySerializer(read_only=True)
@@ -45,11 +65,53 @@ class TitleReadSerializer(serializers.ModelSerializer):
     class Meta:
         """."""
 
-        fields = '__all__'
+        fields = (
+            'id', 'name', 'year', 'rating', 'description', 'genre',
+            'category',
+        )
+        model = Title
+
+
+class TopTitleSerializer(TitleReadSerializer):
+    """Сериалайзер произведений в топах."""
+
+    weighted_rating = serializers.FloatField(read_only=True)
+    reviews_count = serializers.IntegerField(
+        source='rating_count', read_only=True
+    )
+
+    class Meta(TitleReadSerializer.Meta):
+        fields = TitleReadSerializer.Meta.fields + (
+            'weighted_rating', 'reviews_count',
+        )
+
+
+class TitleStatsSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                           serializers.ModelSerializer):
+    """Сериалайзер статистики оценок произведения."""
+
+    reviews_count = serializers.IntegerField(
+        source='rating_count', read_only=True
+    )
+    score_distribution = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+    class Meta:
+        fields = ('id', 'rating', 'reviews_count', 'score_distribution')
         model = Title
 
 
-class TitleWriteSerializer(serializers.ModelSerializer):
+class LeaderboardParamsSerializer(serializers.Serializer):
+    """Параметры запроса топа произведений."""
+
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    min_reviews = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=50)
+
+
+class TitleWriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериалайзер для записи Тайтлов."""
 
     category = serializers.SlugRelatedField(
@@ -63,7 +125,7 @@ class TitleWriteSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
         model = Title
 
     def validate_year(self, value):
@@ -78,7 +140,8 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         return value
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                     serializers.ModelSerializer):
     """Сериалайзер для редактирования пользователя."""
 
     class Meta:
@@ -94,14 +157,15 @@ class UserSerializer(serializers.ModelSerializer):
         return value
 
 
-class ForUserAndAdminSerializer(serializers.ModelSerializer):
+class ForUserAndAdminSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                                serializers.ModelSerializer):
     """Сериалайзер для пользователей со статусом user и admin."""
 
     email = serializers.EmailField(
         max_length=254,
         validators=[UniqueValidator(
             queryset=User.objects.all(),
-            message='Этот адрес электроной почты уже используется'
+            message=MESSAGE_FOR_TAKEN_EMAIL
         )]
     )
 
@@ -134,22 +198,60 @@ class UsersMeSerializer(ForUserAndAdminSerializer):
         )
 
 
-class SendCodeUserSerializer(serializers.ModelSerializer):
-    """Сериалайзер для отправки сообщения на почту."""
-
-    email = serializers.EmailField(max_length=254)
-    username = serializers.CharField(max_length=150)
+class SendCodeUserSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Сериалайзер регистрации и повторной отправки кода.
 
-    class Meta:
+    Пользователь с таким username или email ищется одним запросом: если
+    оба значения принадлежат одному пользователю, он возвращается как
+    есть, иначе занятые значения дают ошибку, а незанятые — нового
+    неактивного пользователя.
+    """
 
-        model = User
-        fields = (
-            'username', 'email', 'first_name',
-            'last_name', 'bio', 'role'
-        )
+    email = serializers.EmailField(max_length=254)
+    username = serializers.CharField(
+        max_length=150, validators=[validate_username]
+    )
 
+    def validate(self, data):
+        users = list(User.objects.filter(
+            Q(username=data['username']) | Q(email=data['email'])
+        )[:2])
+        for user in users:
+            if (user.username, user.email) == (
+                data['username'], data['email']
+            ):
+                data['user'] = user
+                return data
+        errors = {}
+        if any(user.username == data['username'] for user in users):
+            errors['username'] = [MESSAGE_FOR_TAKEN_USERNAME]
+        if any(user.email == data['email'] for user in users):
+            errors['email'] = [MESSAGE_FOR_TAKEN_EMAIL]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
 
-class TokenSerializer(serializers.Serializer):
+    def create(self, validated_data):
+        user = validated_data.get('user')
+        if user is not None:
+            return user
+        try:
+            with transaction.atomic():
+                return User.objects.create(
+                    username=validated_data['username'],
+                    email=validated_data['email'],
+                    is_active=False,
+                )
+        except IntegrityError:
+            # Параллельная регистрация заняла username или email: повторная
+            # проверка вернёт её пользователя или ошибки нужных полей.
+            user = self.validate(dict(validated_data)).get('user')
+            if user is None:
+                raise
+            return user
+
+
+class TokenSerializer(TimedSerializerMixin, serializers.Serializer):
     """Сериализатор для получения токена."""
 
     username = serializers.CharField(max_length=200, required=True)
@@ -159,12 +261,11 @@ class TokenSerializer(serializers.Serializer):
         """Метод валидации username."""
         if value == RESERVED_NAME:
             raise serializers.ValidationError(MESSAGE_FOR_RESERVED_NAME)
-        if not User.objects.filter(username=value).exists():
-            raise exceptions.NotFound(MESSAGE_FOR_USER_NOT_FOUND)
         return value
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                       serializers.ModelSerializer):
     """Ревью сериализатор."""
 
     title = serializers.SlugRelatedField(
@@ -199,7 +300,8 @@ class ReviewSerializer(serializers.ModelSerializer):
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, TimedSerializerMixin,
+                        serializers.ModelSerializer):
     """Сериализатор для Комментариев."""
 
     author = serializers.SlugRelatedField(slug_field='username',
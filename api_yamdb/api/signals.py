@@ -0,0 +1,130 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import access_changed, bulk_changed
+
+from .authentication import ACCESS_FIELDS, access_resource, user_resource
+from .cache import bump_versions
+
+# Ресурсы, которые сбрасываются при массовом изменении модели. Версии
+# reviews и comments входят в ответы всех отзывов и комментариев.
+BULK_RESOURCES = {
+    Category: ('categories',),
+    Genre: ('genres',),
+    Title: ('titles', 'reviews'),
+    Title.genre.through: ('titles',),
+    Review: ('titles', 'reviews'),
+    Comment: ('comments',),
+    User: ('users',),
+}
+
+
+# Поля пользователя, сохранённые значения которых сравнивают сигналы.
+TRACKED_FIELDS = ('username', *ACCESS_FIELDS)
+
+
+def catalogue_changed(sender, instance, **kwargs):
+    resources = BULK_RESOURCES[sender]
+    if sender is Title:
+        # Название произведения входит в ответы его отзывов.
+        resources = ('titles', f'reviews:{instance.pk}')
+    bump_versions(*resources)
+
+
+# Обработчики подключаются к конкретным моделям: обработчик без sender
+# отключил бы быстрое каскадное удаление для всех моделей.
+for model in (Category, Genre, Title):
+    post_save.connect(catalogue_changed, sender=model)
+    post_delete.connect(catalogue_changed, sender=model)
+
+
+@receiver(bulk_changed)
+def models_bulk_changed(sender, **kwargs):
+    resources = BULK_RESOURCES.get(sender)
+    if resources:
+        bump_versions(*resources)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_versions('titles')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    """Отзыв меняет список отзывов и рейтинг произведения."""
+    bump_versions('titles', f'reviews:{instance.title_id}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump_versions(f'comments:{instance.review_id}')
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Имя автора входит в отзывы и комментарии.
+
+    Подключён раньше user_access_saved, поэтому сравнивает имя со значением
+    до сохранения.
+    """
+    if created or (update_fields and 'username' not in update_fields):
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if loaded.get('username') != instance.username:
+        bump_versions('users')
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    bump_versions('users')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_auth_changed(sender, instance, **kwargs):
+    """Сбрасывает пользователя в кеше аутентификации."""
+    bump_versions(user_resource(instance.pk))
+
+
+@receiver(pre_save, sender=User)
+def user_access_changing(sender, instance, update_fields=None, **kwargs):
+    """Отзывает права из выданных токенов, если они изменились."""
+    if instance.pk is None or (
+        update_fields and not set(update_fields) & set(ACCESS_FIELDS)
+    ):
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if all(field in loaded for field in ACCESS_FIELDS):
+        stored = {field: loaded[field] for field in ACCESS_FIELDS}
+    else:
+        stored = sender.objects.filter(pk=instance.pk).values(
+            *ACCESS_FIELDS
+        ).first()
+    if stored != {field: getattr(instance, field) for field in ACCESS_FIELDS}:
+        bump_versions(access_resource(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def user_access_saved(sender, instance, update_fields=None, **kwargs):
+    """Запоминает сохранённые значения для следующего сравнения."""
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is not None:
+        loaded.update({
+            field: getattr(instance, field) for field in TRACKED_FIELDS
+            if update_fields is None or field in update_fields
+        })
+
+
+@receiver(post_delete, sender=User)
+def user_access_deleted(sender, instance, **kwargs):
+    bump_versions(access_resource(instance.pk))
+
+
+@receiver(access_changed)
+def users_access_changed(sender, pks, **kwargs):
+    bump_versions(*(access_resource(pk) for pk in pks))
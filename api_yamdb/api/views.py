@@ -1,55 +1,73 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
-from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.decorators import action
+from rest_framework.exceptions import MethodNotAllowed, NotFound
 from rest_framework.filters import SearchFilter
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Comment, Genre, Review, Title, User
-
-from api_yamdb.settings import DEFAULT_FROM_EMAIL
-
-from .filters import TitleFilter
+from reviews.leaderboards import leaderboard
+from reviews.models import (SCORES, Category, Comment, Genre, Review, Title,
+                            User)
+from reviews.outbox import enqueue_email
+
+from api_yamdb.metrics import AUTH_TOKENS
+
+from .authentication import RoleAccessToken
+from .cache import ConditionalListMixin, ConditionalRetrieveMixin
+from .fieldsets import SparseQuerysetMixin
+from .filters import TitleFilter, TitleOrderingFilter
+from .pagination import OptionalCursorPagination
 from .permissions import (IsAdminOrReadOnly, IsAdminOrSuperUser, IsModerator,
                           IsOwner)
-from .serializers import (CategorySerializer, CommentSerializer,
-                          ForUserAndAdminSerializer, GenreSerializer,
+from .serializers import (MESSAGE_FOR_USER_NOT_FOUND, CategorySerializer,
+                          CommentSerializer, ForUserAndAdminSerializer,
+                          GenreSerializer, LeaderboardParamsSerializer,
                           ReviewSerializer, SendCodeUserSerializer,
-                          TitleReadSerializer, TitleWriteSerializer,
-                          TokenSerializer, UsersMeSerializer)
+                          TitleReadSerializer, TitleStatsSerializer,
+                          TitleWriteSerializer, TokenSerializer,
+                          TopTitleSerializer, UsersMeSerializer)
 
 
-class CreateDesListViewSet(mixins.CreateModelMixin, mixins.DestroyModelMixin,
+class CreateDesListViewSet(ConditionalListMixin, SparseQuerysetMixin,
+                           mixins.CreateModelMixin, mixins.DestroyModelMixin,
                            mixins.ListModelMixin, viewsets.GenericViewSet):
     permission_classes = [IsAdminOrReadOnly]
     pagination_class = PageNumberPagination
     filter_backends = (DjangoFilterBackend, SearchFilter)
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_responses = True
 
 
 class CategoryViewSet(CreateDesListViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_resources = ('categories',)
 
 
 class GenreViewSet(CreateDesListViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_resources = ('genres',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
-    filter_backends = (DjangoFilterBackend,)
+class TitleViewSet(ConditionalListMixin, ConditionalRetrieveMixin,
+                   SparseQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('rating', 'year', 'reviews_count', 'name', 'id')
+    ordering = ('id',)
     permission_classes = [IsAdminOrReadOnly]
+    cache_resources = ('titles', 'categories', 'genres')
+    cache_responses = True
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -57,16 +75,49 @@ class TitleViewSet(viewsets.ModelViewSet):
 
         return TitleWriteSerializer
 
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        avg = Review.objects.filter(title=instance).aggregate(Avg('score'))
-        instance.rating = avg['score__avg']
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """Средняя оценка и распределение оценок 1–10."""
+        return self.conditional_response(self.title_stats, request)
+
+    def title_stats(self, request):
+        title = get_object_or_404(
+            Title.objects.only(
+                'rating', 'rating_count',
+                *(f'score_{score}' for score in SCORES)
+            ),
+            pk=self.kwargs['pk'],
+        )
+        return Response(
+            TitleStatsSerializer(title, context={'request': request}).data
+        )
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие произведения по байесовскому рейтингу."""
+        return self.conditional_response(self.leaderboard, request, 'rating')
+
+    @action(detail=False, url_path='most-reviewed')
+    def most_reviewed(self, request):
+        """Произведения с наибольшим числом отзывов."""
+        return self.conditional_response(
+            self.leaderboard, request, 'reviews'
+        )
+
+    def leaderboard(self, request, order):
+        params = LeaderboardParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        titles = leaderboard(order, **params.validated_data)
+        return Response(TopTitleSerializer(
+            titles, many=True, context={'request': request}
+        ).data)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalListMixin, ConditionalRetrieveMixin,
+                    SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    pagination_class = OptionalCursorPagination
+    sparse_required_fields = ('pub_date',)
     permission_classes = [IsOwner, ]
     permission_classes_by_action = {'list': [AllowAny],
                                     'create': [IsOwner | IsAdminOrReadOnly
@@ -82,18 +133,27 @@ class ReviewViewSet(viewsets.ModelViewSet):
         except KeyError:
             return [permission() for permission in self.permission_classes]
 
+    def get_cache_resources(self):
+        title_id = self.kwargs.get('title_id')
+        return (f'reviews:{title_id}', 'reviews', 'users')
+
     def perform_create(self, serializer):
         title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
         serializer.save(author=self.request.user, title=title)
 
     def get_queryset(self):
-        queryset = Review.objects.filter(title__id=self.kwargs.get('title_id'))
+        queryset = Review.objects.filter(
+            title__id=self.kwargs.get('title_id')
+        ).select_related('author', 'title')
 
         return queryset
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalListMixin, ConditionalRetrieveMixin,
+                     SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    pagination_class = OptionalCursorPagination
+    sparse_required_fields = ('pub_date',)
     permission_classes = [IsOwner, ]
     permission_classes_by_action = {'list': [AllowAny],
                                     'create': [IsOwner | IsAdminOrSuperUser
@@ -103,6 +163,10 @@ class CommentViewSet(viewsets.ModelViewSet):
                                     'destroy': [IsAdminOrReadOnly
                                                 | IsModerator]}
 
+    def get_cache_resources(self):
+        review_id = self.kwargs.get('review_id')
+        return (f'comments:{review_id}', 'comments', 'users')
+
     def perform_create(self, serializer):
         title_id = self.kwargs.get('title_id')
         review_id = self.kwargs.get('review_id')
@@ -112,7 +176,7 @@ class CommentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = Comment.objects.filter(
             review__id=self.kwargs.get('review_id')
-        )
+        ).select_related('author')
         return queryset
 
 
@@ -124,22 +188,29 @@ class APIToken(APIView):
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            user = get_object_or_404(
-                User, username=serializer.data['username'])
+            # единственный запрос пользователя на пути выдачи токена
+            user = User.objects.filter(
+                username=serializer.data['username']).first()
+            if user is None:
+                AUTH_TOKENS.inc(outcome='unknown_user')
+                raise NotFound(MESSAGE_FOR_USER_NOT_FOUND)
             # проверяем confirmation code, если верный, выдаем токен
             if default_token_generator.check_token(
                user, serializer.data['confirmation_code']):
-                token = AccessToken.for_user(user)
-                user.is_active = True
-                user.save()
+                if not user.is_active:
+                    user.is_active = True
+                    user.save(update_fields=['is_active'])
+                token = RoleAccessToken.for_user(user)
+                AUTH_TOKENS.inc(outcome='issued')
                 return Response(
                     {'token': str(token)}, status=status.HTTP_200_OK)
+            AUTH_TOKENS.inc(outcome='bad_code')
             return Response({
                 'confirmation code': 'Некорректный код подтверждения!'},
                 status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSetForAdmin(ModelViewSet):
+class UserViewSetForAdmin(SparseQuerysetMixin, ModelViewSet):
     """Работа с пользователями для администратора."""
 
     queryset = User.objects.all()
@@ -162,30 +233,26 @@ class APIUser(APIView):
     permission_classes = (IsAuthenticated,)
 
     def get(self, request, *args, **kwargs):
-        user = get_object_or_404(User, username=request.user.username)
-        serializer = UsersMeSerializer(user, many=False)
+        serializer = UsersMeSerializer(
+            request.user, many=False, context={'request': request})
         return Response(serializer.data)
 
     def patch(self, request, *args, **kwargs):
-        user = get_object_or_404(User, username=request.user.username)
         serializer = UsersMeSerializer(
-            user, data=request.data, partial=True, many=False)
+            request.user, data=request.data, partial=True, many=False)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-def create_confirmation_code_and_send_email(username, to_email):
+def create_confirmation_code_and_send_email(user):
     """Создаем confirmation code и отправляем по email."""
-    user = get_object_or_404(User, username=username)
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    enqueue_email(
         'Код подтверждения',
         f'Ваш код подтверждения {confirmation_code}',
-        DEFAULT_FROM_EMAIL,
-        [to_email],
-        fail_silently=False,
+        user.email,
     )
 
 
@@ -195,18 +262,12 @@ class APISignUp(APIView):
     permission_classes = (AllowAny,)
 
     def post(self, request):
-        code_serializer = SendCodeUserSerializer(data=request.data)
-        code_serializer.is_valid(raise_exception=True)
-        serializer = ForUserAndAdminSerializer(data=request.data)
-        data = code_serializer.data
-        if not User.objects.filter(username=data['username'],
-                                   email=data['email']).exists():
-            serializer.is_valid(raise_exception=True)
-            serializer.save(is_active=False)
+        serializer = SendCodeUserSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.save()
         # создаем confirmation code и отправляем на почту
-        create_confirmation_code_and_send_email(
-            data['username'], data['email'])
+        create_confirmation_code_and_send_email(user)
         return Response(
-            {'email': data['email'],
-             'username': data['username']},
+            {'email': user.email,
+             'username': user.username},
             status=status.HTTP_200_OK)
@@ -0,0 +1,266 @@
+"""Метрики в текстовом формате Prometheus.
+
+Счётчики и гистограммы хранятся в памяти процесса под блокировкой, так что
+их можно обновлять из потоков WSGI-сервера. При нескольких процессах
+(gunicorn) задаётся папка METRICS_MULTIPROCESS_DIR: каждый процесс
+периодически сбрасывает туда снимок своих значений, а /metrics суммирует
+снимки всех процессов. Файл снимка называется по pid и случайному
+идентификатору процесса, поэтому процесс с повторно выданным pid не
+затирает снимок завершённого, и суммы счётчиков не уменьшаются.
+"""
+import abc
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Metric(abc.ABC):
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: list(value) if isinstance(value, list) else value
+                for key, value in self._values.items()
+            }
+
+    @abc.abstractmethod
+    def samples(self, key, value):
+        """Строки вывода: (имя, имена меток, значения меток, значение)."""
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self, key, value):
+        yield self.name, self.labelnames, key, value
+
+
+class Histogram(Metric):
+    """Гистограмма: число наблюдений по корзинам, их сумма и количество.
+
+    Значение по меткам — список [корзина_1, ..., корзина_n, +Inf, сумма],
+    корзины хранятся некумулятивно и складываются при выводе.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1)
+                state.append(0.0)
+            state[index] += 1
+            state[-1] += value
+
+    def samples(self, key, value):
+        labelnames = self.labelnames + ('le',)
+        cumulative = 0
+        bounds = [format_value(bound) for bound in self.buckets] + ['+Inf']
+        for bound, count in zip(bounds, value):
+            cumulative += count
+            yield (f'{self.name}_bucket', labelnames, key + (bound,),
+                   cumulative)
+        yield f'{self.name}_sum', self.labelnames, key, value[-1]
+        yield f'{self.name}_count', self.labelnames, key, cumulative
+
+
+def merge_values(first, second):
+    if isinstance(first, list):
+        return [a + b for a, b in zip(first, second)]
+    return first + second
+
+
+def format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return str(value)
+
+
+def escape(value):
+    return (value.replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = []
+        self._flush_lock = threading.Lock()
+        self._flushed_at = 0.0
+        self._pid = None
+        self._file_name = None
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self):
+        """Значения этого процесса: {имя: {json меток: значение}}."""
+        return {
+            metric.name: {
+                json.dumps(key): value
+                for key, value in metric.snapshot().items()
+            }
+            for metric in self.metrics
+        }
+
+    def file_name(self):
+        """Имя файла снимка; после fork у процесса появляется своё."""
+        pid = os.getpid()
+        if self._pid != pid:
+            self._pid = pid
+            self._file_name = f'metrics_{pid}_{uuid.uuid4().hex}.json'
+        return self._file_name
+
+    def flush(self, directory):
+        """Атомарно записывает снимок процесса в папку directory."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        descriptor, tmp_path = tempfile.mkstemp(dir=directory,
+                                                suffix='.tmp')
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as tmp_file:
+            json.dump(self.snapshot(), tmp_file)
+        os.replace(tmp_path, directory / self.file_name())
+
+    def maybe_flush(self):
+        """Сбрасывает снимок не чаще раза в METRICS_FLUSH_INTERVAL секунд."""
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        if not directory:
+            return
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        now = time.monotonic()
+        if now - self._flushed_at < interval:
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._flushed_at = now
+            self.flush(directory)
+        finally:
+            self._flush_lock.release()
+
+    def collect(self):
+        """Значения всех процессов; снимки завершённых процессов остаются,
+        чтобы счётчики не уменьшались."""
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        if not directory:
+            return self.snapshot()
+        self.flush(directory)
+        merged = {}
+        for path in sorted(Path(directory).glob('metrics_*.json')):
+            try:
+                snapshot = json.loads(path.read_text('utf-8'))
+            except (OSError, ValueError):
+                continue
+            for name, values in snapshot.items():
+                target = merged.setdefault(name, {})
+                for key, value in values.items():
+                    target[key] = (merge_values(target[key], value)
+                                   if key in target else value)
+        return merged
+
+    def render(self):
+        collected = self.collect()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for key, value in sorted(collected.get(metric.name, {}).items()):
+                samples = metric.samples(tuple(json.loads(key)), value)
+                for name, labelnames, labelvalues, sample in samples:
+                    labels = ','.join(
+                        f'{label}="{escape(label_value)}"'
+                        for label, label_value in zip(labelnames, labelvalues)
+                    )
+                    labels = f'{{{labels}}}' if labels else ''
+                    lines.append(f'{name}{labels} {format_value(sample)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    'yamdb_http_requests_total', 'Число HTTP-запросов.',
+    ('route', 'method', 'status'),
+))
+ERRORS = registry.register(Counter(
+    'yamdb_http_request_errors_total',
+    'Число запросов, завершившихся ошибкой сервера (5xx).',
+    ('route', 'method'),
+))
+LATENCY = registry.register(Histogram(
+    'yamdb_http_request_duration_seconds', 'Время обработки запроса.',
+    ('route', 'method'),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+))
+DB_QUERIES = registry.register(Histogram(
+    'yamdb_http_request_db_queries', 'Число SQL-запросов на HTTP-запрос.',
+    ('route', 'method'),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+))
+DB_DURATION = registry.register(Histogram(
+    'yamdb_http_request_db_duration_seconds',
+    'Суммарное время SQL-запросов на HTTP-запрос.',
+    ('route', 'method'),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+))
+AUTH_TOKENS = registry.register(Counter(
+    'yamdb_auth_token_total',
+    'Запросы токена: issued, bad_code, unknown_user.',
+    ('outcome',),
+))
+
+
+def metrics_allowed(request):
+    """С METRICS_TOKEN нужен заголовок Authorization: Bearer <токен>,
+    без него доступ есть только с адресов METRICS_ALLOWED_IPS."""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        return hmac.compare_digest(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+        )
+    return request.META.get('REMOTE_ADDR') in getattr(
+        settings, 'METRICS_ALLOWED_IPS', ()
+    )
+
+
+def metrics_view(request):
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        raise Http404
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,153 @@
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics as prometheus
+
+logger = logging.getLogger('api_yamdb.requests')
+
+HTTP_METHODS = frozenset((
+    'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS',
+))
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL-запросы, время БД и сериализации."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper, работает и без DEBUG."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+@contextmanager
+def serializer_timer():
+    """Учитывает время сериализации; вложенные сериализаторы не суммируются.
+
+    Время ленивых запросов к БД внутри сериализатора входит и в db,
+    и в serializer.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    metrics.serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_time += time.perf_counter() - start
+
+
+class RequestTimingMiddleware:
+    """Число SQL-запросов и время БД, сериализации и всего запроса.
+
+    Включается настройкой REQUEST_TIMING_ENABLED. Значения передаются в
+    заголовке Server-Timing и пишутся в лог api_yamdb.requests по имени
+    маршрута (titles-list, reviews-detail, ...).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        total_time = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={metrics.db_time * 1000:.2f};'
+            f'desc="{metrics.queries} queries"',
+            f'serializer;dur={metrics.serializer_time * 1000:.2f}',
+            f'view;dur={total_time * 1000:.2f}',
+        ))
+        logger.info(json.dumps({
+            'route': route_name(request),
+            'method': request.method,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 2),
+            'serializer_ms': round(metrics.serializer_time * 1000, 2),
+            'view_ms': round(total_time * 1000, 2),
+        }))
+        return response
+
+
+class MetricsMiddleware:
+    """Счётчики и гистограммы запросов по маршрутам для /metrics.
+
+    Включается настройкой METRICS_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        start = time.perf_counter()
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            route = route_name(request)
+            method = request.method
+            if method not in HTTP_METHODS:
+                # Ограничиваем число рядов метрик.
+                method = 'OTHER'
+            prometheus.REQUESTS.inc(route=route, method=method, status=status)
+            if status >= 500:
+                prometheus.ERRORS.inc(route=route, method=method)
+            prometheus.LATENCY.observe(
+                time.perf_counter() - start, route=route, method=method
+            )
+            prometheus.DB_QUERIES.observe(
+                metrics.queries, route=route, method=method
+            )
+            prometheus.DB_DURATION.observe(
+                metrics.db_time, route=route, method=method
+            )
+            prometheus.registry.maybe_flush()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.url_name:
+        return 'unknown'
+    return match.url_name
@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api_yamdb.middleware.MetricsMiddleware',
+    'api_yamdb.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -116,13 +118,26 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DEFAULT_FROM_EMAIL = 'webmaster@localhost'
 
+# Очередь исходящих писем: письма регистрации сохраняются в OutgoingEmail
+# и отправляются командой send_emails --loop, а не в запросе. Повторная
+# попытка откладывается на EMAIL_OUTBOX_RETRY_DELAY секунд, удваиваясь с
+# каждой попыткой. Пачка занимается на EMAIL_OUTBOX_LEASE секунд: срок
+# должен быть больше времени отправки пачки. Отправленные письма хранятся
+# EMAIL_OUTBOX_RETENTION_DAYS дней.
+EMAIL_OUTBOX_ENABLED = os.getenv('EMAIL_OUTBOX_ENABLED') == 'true'
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_LEASE = 300
+EMAIL_OUTBOX_RETENTION_DAYS = 30
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS':
@@ -130,6 +145,69 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
 }
 
+# Server-Timing и лог api_yamdb.requests с числом SQL-запросов и временем
+# БД, сериализации и всего запроса.
+REQUEST_TIMING_ENABLED = False
+
+# В продакшене нужен общий для процессов кеш (Redis, Memcached), иначе
+# сброс кеша ответов сигналами не дойдёт до других процессов.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Время жизни закешированных ответов каталога, секунды.
+API_CACHE_TIMEOUT = 60 * 10
+
+# Время жизни пользователя в кеше JWT-аутентификации, секунды. Изменения
+# через save() сбрасывают запись сразу.
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Проверка прав по роли из токена, без загрузки пользователя. Версии прав
+# хранятся в кеше, поэтому включайте её только с общим для всех процессов
+# кешем (Redis, Memcached): в локальном кеше процесса отзыв прав не виден
+# другим процессам. Понижение роли отзывает её из выданных токенов через
+# версию прав; AUTH_TOKEN_CLAIMS_MAX_AGE дополнительно ограничивает, сколько
+# секунд после выдачи токена ему доверяют на случай изменений в обход
+# сигналов (None — весь срок жизни токена).
+AUTH_TOKEN_CLAIMS = os.getenv('AUTH_TOKEN_CLAIMS') == 'true'
+AUTH_TOKEN_CLAIMS_MAX_AGE = None
+
+# Байесовский рейтинг в топах произведений: оценки усредняются вместе с
+# RATING_PRIOR_COUNT условными оценками RATING_PRIOR_SCORE. После
+# изменения значений выполните recalculate_ratings.
+RATING_PRIOR_SCORE = 5.5
+RATING_PRIOR_COUNT = 10
+
+# Метрики Prometheus на /metrics, по умолчанию выключены. Доступ: по
+# заголовку Authorization: Bearer <METRICS_TOKEN>, если токен задан, иначе
+# только с адресов METRICS_ALLOWED_IPS. При нескольких процессах gunicorn
+# нужна общая папка, куда процессы сбрасывают свои значения раз в
+# METRICS_FLUSH_INTERVAL секунд.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED') == 'true'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+METRICS_MULTIPROCESS_DIR = os.getenv('METRICS_MULTIPROCESS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api_yamdb.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -0,0 +1,127 @@
+"""Топы произведений по байесовскому рейтингу и по числу отзывов.
+
+Байесовский рейтинг усредняет оценки произведения вместе с
+RATING_PRIOR_COUNT условными оценками RATING_PRIOR_SCORE, поэтому
+произведение с одной десяткой не обгоняет произведение с сотней девяток.
+Строки LeaderboardEntry обновляются вместе с рейтингом произведения.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import ExpressionWrapper, FloatField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+from .models import LeaderboardEntry, Title
+
+
+def weighted_rating_expression(rating_sum, rating_count):
+    prior_count = settings.RATING_PRIOR_COUNT
+    prior_sum = prior_count * settings.RATING_PRIOR_SCORE
+    return ExpressionWrapper(
+        (Cast(rating_sum, FloatField()) + prior_sum)
+        / (Cast(rating_count, FloatField()) + prior_count),
+        output_field=FloatField(),
+    )
+
+
+def weighted_rating(rating_sum, rating_count):
+    prior_count = settings.RATING_PRIOR_COUNT
+    return (
+        (rating_sum + prior_count * settings.RATING_PRIOR_SCORE)
+        / (rating_count + prior_count)
+    )
+
+
+def refresh_entries(queryset=None):
+    """Копирует число отзывов и рейтинг произведений в их строки топов.
+
+    queryset — строки LeaderboardEntry, по умолчанию все.
+    """
+    if queryset is None:
+        queryset = LeaderboardEntry.objects.all()
+    title = Title.objects.filter(pk=OuterRef('title_id'))
+    return queryset.update(
+        rating_count=Subquery(title.values('rating_count')),
+        weighted_rating=Subquery(title.annotate(
+            weighted=weighted_rating_expression('rating_sum', 'rating_count')
+        ).values('weighted')),
+    )
+
+
+def build_entries(title_genres):
+    """Строки топов для пар (id произведения, id жанра или None)."""
+    title_genres = list(title_genres)
+    titles = Title.objects.only(
+        'category_id', 'rating_sum', 'rating_count'
+    ).in_bulk({title_id for title_id, _ in title_genres})
+    return [
+        LeaderboardEntry(
+            title_id=title_id,
+            genre_id=genre_id,
+            category_id=titles[title_id].category_id,
+            rating_count=titles[title_id].rating_count,
+            weighted_rating=weighted_rating(
+                titles[title_id].rating_sum, titles[title_id].rating_count
+            ),
+        )
+        for title_id, genre_id in title_genres
+        if title_id in titles
+    ]
+
+
+def add_entries(title_genres):
+    LeaderboardEntry.objects.bulk_create(build_entries(title_genres))
+
+
+def rebuild_leaderboards():
+    """Строит строки топов заново, например после массовой загрузки.
+
+    Строки собираются одним INSERT ... SELECT на стороне базы.
+    """
+    prior_count = settings.RATING_PRIOR_COUNT
+    prior_sum = prior_count * settings.RATING_PRIOR_SCORE
+    weighted = (
+        'CAST(t.rating_sum + %s AS DOUBLE PRECISION) / (t.rating_count + %s)'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {LeaderboardEntry._meta.db_table}')
+        cursor.execute(
+            f'INSERT INTO {LeaderboardEntry._meta.db_table} '
+            f'(title_id, genre_id, category_id, rating_count, '
+            f'weighted_rating) '
+            f'SELECT t.id, NULL, t.category_id, t.rating_count, {weighted} '
+            f'FROM {Title._meta.db_table} t '
+            f'UNION ALL '
+            f'SELECT t.id, tg.genre_id, t.category_id, t.rating_count, '
+            f'{weighted} '
+            f'FROM {Title.genre.through._meta.db_table} tg '
+            f'JOIN {Title._meta.db_table} t ON t.id = tg.title_id',
+            (float(prior_sum), prior_count) * 2,
+        )
+
+
+def leaderboard(order, category=None, genre=None, min_reviews=0, limit=50):
+    """Первые limit произведений топа order ('rating' или 'reviews').
+
+    category и genre — слаги, min_reviews — минимальное число отзывов.
+    Возвращает произведения с атрибутом weighted_rating.
+    """
+    entries = LeaderboardEntry.objects.select_related(
+        'title__category'
+    ).prefetch_related('title__genre')
+    if genre is None:
+        entries = entries.filter(genre__isnull=True)
+    else:
+        entries = entries.filter(genre__slug=genre)
+    if category is not None:
+        entries = entries.filter(category__slug=category)
+    if min_reviews:
+        entries = entries.filter(rating_count__gte=min_reviews)
+    if order == 'rating':
+        entries = entries.order_by('-weighted_rating', 'title')
+    else:
+        entries = entries.order_by('-rating_count', 'title')
+    titles = []
+    for entry in entries[:limit]:
+        entry.title.weighted_rating = entry.weighted_rating
+        titles.append(entry.title)
+    return titles
@@ -0,0 +1,410 @@
+import time
+from contextlib import contextmanager
+from csv import DictReader
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from .models import Category, Comment, Genre, Review, Title, User
+from .ratings import recalculate_ratings
+from .signals import access_changed, bulk_changed
+
+DATA_DIR = settings.BASE_DIR / 'static' / 'data'
+DEFAULT_BATCH_SIZE = 5000
+
+
+class CSVLoadError(Exception):
+    """Ошибка в данных загружаемого CSV-файла."""
+
+
+class CSVLoader:
+    """Потоковая загрузка CSV-файла в модель пачками через bulk_create.
+
+    fields сопоставляет колонки CSV с полями модели, foreign_keys —
+    колонки со ссылками на другие модели. Ссылки проверяются одним
+    запросом на пачку, уже найденные id запоминаются. key — поле, по
+    которому строки файла сопоставляются с записями базы при upsert.
+    """
+
+    filename = None
+    model = None
+    fields = {}
+    foreign_keys = {}
+    depends_on = ()
+    key = 'id'
+
+    def __init__(self, data_dir=DATA_DIR, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = data_dir / self.filename
+        self.batch_size = batch_size
+        self.known_ids = {column: set() for column in self.foreign_keys}
+
+    def read(self):
+        with open(self.path, encoding='utf-8', newline='') as csv_file:
+            yield from DictReader(csv_file)
+
+    def batches(self):
+        rows = self.read()
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def parse_id(self, column, value):
+        """id из колонки CSV; None — пустая необязательная ссылка."""
+        if value == '' and self.model._meta.get_field(
+            self.fields[column]
+        ).null:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise CSVLoadError(
+                f'{self.filename}: в колонке {column} не число: {value!r}'
+            )
+
+    def check_foreign_keys(self, batch):
+        for column, related_model in self.foreign_keys.items():
+            known = self.known_ids[column]
+            wanted = {
+                self.parse_id(column, row[column]) for row in batch
+            } - {None} - known
+            if not wanted:
+                continue
+            found = set(related_model.objects.filter(
+                pk__in=wanted
+            ).values_list('pk', flat=True))
+            missing = wanted - found
+            if missing:
+                raise CSVLoadError(
+                    f'{self.filename}: в колонке {column} ссылки на '
+                    f'несуществующие {related_model.__name__}: '
+                    f'{sorted(missing)[:10]}'
+                )
+            known |= found
+
+    def convert(self, field_name, value):
+        field = self.model._meta.get_field(field_name)
+        if value == '' and field.null:
+            return None
+        try:
+            return field.to_python(value)
+        except ValidationError as error:
+            raise CSVLoadError(
+                f'{self.filename}: неверное значение {field_name}: '
+                f'{value!r} ({" ".join(error.messages)})'
+            )
+
+    def build(self, row):
+        return self.model(**{
+            field: self.convert(field, row[column])
+            for column, field in self.fields.items()
+        })
+
+    @contextmanager
+    def file_dates(self):
+        """Записывает даты auto_now_add из файла, а не время загрузки."""
+        fields = [
+            field for field in self.model._meta.concrete_fields
+            if getattr(field, 'auto_now_add', False)
+            and field.attname in self.fields.values()
+        ]
+        for field in fields:
+            field.auto_now_add = False
+        try:
+            yield
+        finally:
+            for field in fields:
+                field.auto_now_add = True
+
+    def bulk_create(self, objects):
+        with self.file_dates():
+            self.model.objects.bulk_create(objects)
+
+    def is_loaded(self):
+        return self.model.objects.exists()
+
+    def load(self):
+        """Загружает файл и возвращает число записанных строк.
+
+        Файл загружается в одной транзакции, пачки — точки сохранения:
+        при ошибке в любой пачке таблица остаётся пустой, и повторный
+        запуск загрузит файл целиком.
+        """
+        rows = 0
+        with transaction.atomic():
+            for batch in self.batches():
+                self.check_foreign_keys(batch)
+                with transaction.atomic():
+                    self.bulk_create([self.build(row) for row in batch])
+                rows += len(batch)
+            self.after_load()
+            bulk_changed.send(sender=self.model)
+        return rows
+
+    def upsert(self):
+        """Добавляет новые и обновляет изменённые строки файла.
+
+        На пачку выполняется один SELECT по ключу, bulk_create для новых
+        строк и bulk_update для изменённых. Возвращает счётчики
+        inserted, updated и unchanged.
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        changed = []
+        for batch in self.batches():
+            self.check_foreign_keys(batch)
+            with transaction.atomic():
+                batch_counts, batch_changed = self.upsert_batch(
+                    [self.build(row) for row in batch]
+                )
+            for name, count in batch_counts.items():
+                counts[name] += count
+            changed.extend(batch_changed)
+        if changed:
+            self.after_load(changed)
+            bulk_changed.send(sender=self.model)
+        return counts
+
+    def upsert_batch(self, objects):
+        update_fields = [
+            field for field in self.fields.values()
+            if field not in ('id', self.key)
+        ]
+        existing = self.model.objects.only(self.key, *update_fields).in_bulk(
+            [getattr(obj, self.key) for obj in objects], field_name=self.key
+        )
+        created, updated, changed = [], [], []
+        for obj in objects:
+            current = existing.get(getattr(obj, self.key))
+            if current is None:
+                created.append(obj)
+                changed.append(obj)
+            elif any(getattr(obj, field) != getattr(current, field)
+                     for field in update_fields):
+                obj.pk = current.pk
+                updated.append(obj)
+                changed.extend((obj, current))
+        self.bulk_create(created)
+        if updated and update_fields:
+            self.model.objects.bulk_update(updated, update_fields)
+        counts = {
+            'inserted': len(created),
+            'updated': len(updated),
+            'unchanged': len(objects) - len(created) - len(updated),
+        }
+        return counts, changed
+
+    def after_load(self, changed=None):
+        """Действия после загрузки, например пересчёт производных полей.
+
+        changed — записи, затронутые upsert (новые и прежние значения);
+        None означает полную загрузку.
+        """
+
+
+class CategoryLoader(CSVLoader):
+    filename = 'category.csv'
+    model = Category
+    fields = {'id': 'id', 'name': 'name', 'slug': 'slug'}
+    key = 'slug'
+
+
+class GenreLoader(CSVLoader):
+    filename = 'genre.csv'
+    model = Genre
+    fields = {'id': 'id', 'name': 'name', 'slug': 'slug'}
+    key = 'slug'
+
+
+class UserLoader(CSVLoader):
+    filename = 'users.csv'
+    model = User
+    fields = {
+        'id': 'id', 'username': 'username', 'email': 'email', 'role': 'role',
+        'bio': 'bio', 'first_name': 'first_name', 'last_name': 'last_name',
+    }
+    key = 'username'
+
+    def after_load(self, changed=None):
+        # bulk_update не отправляет сигналы, а роль в CSV могла измениться.
+        if changed:
+            access_changed.send(
+                sender=User, pks={user.pk for user in changed if user.pk}
+            )
+
+
+class TitleLoader(CSVLoader):
+    filename = 'titles.csv'
+    model = Title
+    fields = {
+        'id': 'id', 'name': 'name', 'year': 'year', 'category': 'category_id',
+    }
+    foreign_keys = {'category': Category}
+    depends_on = (CategoryLoader,)
+
+
+class TitleGenreLoader(CSVLoader):
+    # Жанры произведений читаются из таблицы связи Title.genre, а не из
+    # модели TitleGenre.
+    filename = 'genre_title.csv'
+    model = Title.genre.through
+    fields = {'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id'}
+    foreign_keys = {'title_id': Title, 'genre_id': Genre}
+    depends_on = (TitleLoader, GenreLoader)
+
+
+class ReviewLoader(CSVLoader):
+    filename = 'review.csv'
+    model = Review
+    fields = {
+        'id': 'id', 'title_id': 'title_id', 'text': 'text',
+        'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date',
+    }
+    foreign_keys = {'title_id': Title, 'author': User}
+    depends_on = (TitleLoader, UserLoader)
+
+    def after_load(self, changed=None):
+        # bulk_create и bulk_update не отправляют сигналы.
+        if changed is None:
+            recalculate_ratings()
+        else:
+            recalculate_ratings(Title.objects.filter(
+                pk__in={review.title_id for review in changed}
+            ))
+
+
+class CommentLoader(CSVLoader):
+    filename = 'comments.csv'
+    model = Comment
+    fields = {
+        'id': 'id', 'review_id': 'review_id', 'text': 'text',
+        'author': 'author_id', 'pub_date': 'pub_date',
+    }
+    foreign_keys = {'review_id': Review, 'author': User}
+    depends_on = (ReviewLoader, UserLoader)
+
+
+LOADERS = (
+    UserLoader, CategoryLoader, GenreLoader, TitleLoader, TitleGenreLoader,
+    ReviewLoader, CommentLoader,
+)
+
+
+def loading_stages(loaders=LOADERS):
+    """Группирует загрузчики в этапы: этап зависит только от предыдущих."""
+    stages = []
+    done = set()
+    pending = list(loaders)
+    while pending:
+        stage = [
+            loader for loader in pending
+            if all(dependency in done for dependency in loader.depends_on)
+        ]
+        if not stage:
+            raise CSVLoadError(
+                'Циклическая или неизвестная зависимость: '
+                f'{[loader.filename for loader in pending]}'
+            )
+        stages.append(stage)
+        done.update(stage)
+        pending = [loader for loader in pending if loader not in stage]
+    return stages
+
+
+def validate_files(loaders):
+    """Проверяет CSV до загрузки: уникальные поля и ссылки между файлами.
+
+    Ссылка считается верной, если id есть в файле родительской модели
+    или уже в базе. Возвращает список ошибок.
+    """
+    errors = []
+    file_ids = {}
+    references = []
+    for loader in loaders:
+        unique_columns = [
+            column for column, field in loader.fields.items()
+            if loader.model._meta.get_field(field).unique
+        ]
+        seen = {column: set() for column in unique_columns}
+        referenced = {column: set() for column in loader.foreign_keys}
+        for line, row in enumerate(loader.read(), 2):
+            for column in unique_columns:
+                if row[column] in seen[column]:
+                    errors.append(
+                        f'{loader.filename}, строка {line}: повторяется '
+                        f'{column}={row[column]!r}'
+                    )
+                seen[column].add(row[column])
+            for column in loader.foreign_keys:
+                referenced[column].add(loader.parse_id(column, row[column]))
+        file_ids[loader.model] = {
+            loader.parse_id('id', pk) for pk in seen.get('id', ())
+        }
+        references.append((loader, referenced))
+
+    for loader, referenced in references:
+        for column, related_model in loader.foreign_keys.items():
+            missing = referenced[column] - file_ids.get(
+                related_model, set()
+            ) - {None}
+            if missing:
+                missing -= set(related_model.objects.filter(
+                    pk__in=missing
+                ).values_list('pk', flat=True))
+            if missing:
+                errors.append(
+                    f'{loader.filename}: в колонке {column} ссылки на '
+                    f'несуществующие {related_model.__name__}: '
+                    f'{sorted(missing)[:10]}'
+                )
+    return errors
+
+
+class BaseLoadCommand(BaseCommand):
+    """Команда загрузки одного CSV-файла через loader_class."""
+
+    loader_class = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=DATA_DIR, type=type(DATA_DIR),
+            help='Папка с CSV-файлами.',
+        )
+        parser.add_argument(
+            '--batch-size', default=DEFAULT_BATCH_SIZE, type=int,
+            help='Число строк в одной пачке bulk_create.',
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Добавить новые и обновить изменённые строки.',
+        )
+
+    def handle(self, *args, **options):
+        loader = self.loader_class(options['path'], options['batch_size'])
+        if not options['upsert'] and loader.is_loaded():
+            self.stdout.write('Данные уже загружены.')
+            return
+        start = time.perf_counter()
+        try:
+            if options['upsert']:
+                counts = loader.upsert()
+            else:
+                counts = {'inserted': loader.load()}
+        except (CSVLoadError, IntegrityError, OSError) as error:
+            raise CommandError(error)
+        self.stdout.write(
+            format_result(loader, counts, time.perf_counter() - start)
+        )
+
+
+def format_result(loader, counts, elapsed):
+    """Строка отчёта о загрузке файла со скоростью в строках/с."""
+    rows = sum(counts.values())
+    details = ', '.join(f'{name}: {count}' for name, count in counts.items())
+    return (
+        f'{loader.filename}: {rows} строк за {elapsed:.2f} с '
+        f'({rows / elapsed if elapsed else rows:.0f} строк/с; {details}).'
+    )
@@ -0,0 +1,166 @@
+import csv
+import datetime as dt
+import random
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError, call_command
+
+ROLES = ('user',) * 97 + ('moderator',) * 2 + ('admin',)
+START_DATE = dt.datetime(2015, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def skewed_counts(total, buckets, limit, skew):
+    """Распределяет total по корзинам по закону Ципфа, не больше limit.
+
+    Первые корзины получают основную долю, хвост — по нескольку штук.
+    """
+    weights = [1 / rank ** skew for rank in range(1, buckets + 1)]
+    weights_sum = sum(weights)
+    counts = [min(limit, int(total * weight / weights_sum))
+              for weight in weights]
+    rest = total - sum(counts)
+    while rest > 0:
+        free = [idx for idx, count in enumerate(counts) if count < limit]
+        if not free:
+            raise CommandError(
+                'Отзывов больше, чем пар (пользователь, произведение).'
+            )
+        for idx in free[-rest:]:
+            counts[idx] += 1
+        rest = total - sum(counts)
+    return counts
+
+
+class Command(BaseCommand):
+    help = "Генерация синтетических CSV-данных для нагрузочного тестирования"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path,
+                            help='Папка для CSV-файлов.')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=500)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель Ципфа для числа отзывов на произведение.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--load', action='store_true',
+            help='Загрузить данные в базу командой load_all.',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.path = options['path']
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.write_users(options['users'])
+        self.write_named('category.csv', 'Категория', 'category',
+                         options['categories'])
+        self.write_named('genre.csv', 'Жанр', 'genre', options['genres'])
+        self.write_titles(options['titles'], options['categories'])
+        self.write_genre_title(options['titles'], options['genres'])
+        reviews = self.write_reviews(
+            options['reviews'], options['titles'], options['users'],
+            options['skew'],
+        )
+        self.write_comments(options['comments'], reviews, options['users'])
+        self.stdout.write(f'Данные записаны в {self.path}.')
+
+        if options['load']:
+            call_command('load_all', path=self.path, stdout=self.stdout)
+
+    def writer(self, filename, header):
+        csv_file = open(self.path / filename, 'w', encoding='utf-8',
+                        newline='')
+        writer = csv.writer(csv_file)
+        writer.writerow(header)
+        return csv_file, writer
+
+    def pub_date(self):
+        seconds = self.rng.randrange(10 * 365 * 24 * 3600)
+        date = START_DATE + dt.timedelta(seconds=seconds)
+        return date.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+    def write_users(self, count):
+        csv_file, writer = self.writer(
+            'users.csv',
+            ('id', 'username', 'email', 'role', 'bio', 'first_name',
+             'last_name'),
+        )
+        with csv_file:
+            for pk in range(1, count + 1):
+                writer.writerow((
+                    pk, f'user{pk}', f'user{pk}@yamdb.fake',
+                    self.rng.choice(ROLES), '', '', '',
+                ))
+
+    def write_named(self, filename, name, slug, count):
+        csv_file, writer = self.writer(filename, ('id', 'name', 'slug'))
+        with csv_file:
+            for pk in range(1, count + 1):
+                writer.writerow((pk, f'{name} {pk}', f'{slug}-{pk}'))
+
+    def write_titles(self, count, categories):
+        year = dt.date.today().year
+        csv_file, writer = self.writer(
+            'titles.csv', ('id', 'name', 'year', 'category')
+        )
+        with csv_file:
+            for pk in range(1, count + 1):
+                writer.writerow((
+                    pk, f'Произведение {pk}', self.rng.randint(1900, year),
+                    self.rng.randint(1, categories),
+                ))
+
+    def write_genre_title(self, titles, genres):
+        csv_file, writer = self.writer(
+            'genre_title.csv', ('id', 'title_id', 'genre_id')
+        )
+        pk = 0
+        with csv_file:
+            for title_id in range(1, titles + 1):
+                count = self.rng.randint(1, min(3, genres))
+                for genre_id in self.rng.sample(range(1, genres + 1), count):
+                    pk += 1
+                    writer.writerow((pk, title_id, genre_id))
+
+    def write_reviews(self, count, titles, users, skew):
+        """Пишет отзывы, у популярных произведений их больше всего."""
+        counts = skewed_counts(count, titles, users, skew)
+        title_ids = list(range(1, titles + 1))
+        self.rng.shuffle(title_ids)
+        csv_file, writer = self.writer(
+            'review.csv',
+            ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        )
+        pk = 0
+        with csv_file:
+            for title_id, reviews in zip(title_ids, counts):
+                authors = self.rng.sample(range(1, users + 1), reviews)
+                for author in authors:
+                    pk += 1
+                    writer.writerow((
+                        pk, title_id, f'Отзыв {pk}', author,
+                        self.rng.randint(1, 10), self.pub_date(),
+                    ))
+        return pk
+
+    def write_comments(self, count, reviews, users):
+        """Пишет комментарии, большая часть — к первым отзывам."""
+        csv_file, writer = self.writer(
+            'comments.csv', ('id', 'review_id', 'text', 'author', 'pub_date'),
+        )
+        with csv_file:
+            if not reviews:
+                return
+            for pk in range(1, count + 1):
+                review_id = int(reviews * self.rng.random() ** 3) + 1
+                writer.writerow((
+                    pk, review_id, f'Комментарий {pk}',
+                    self.rng.randint(1, users), self.pub_date(),
+                ))
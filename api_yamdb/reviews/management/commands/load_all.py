@@ -0,0 +1,98 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.core.management import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+
+from reviews.loaders import (DATA_DIR, DEFAULT_BATCH_SIZE, CSVLoadError,
+                             format_result, loading_stages, validate_files)
+
+
+def load_file(loader, upsert=False):
+    """Загружает файл в одной транзакции, возвращает счётчики и время."""
+    start = time.perf_counter()
+    with transaction.atomic():
+        if upsert:
+            counts = loader.upsert()
+        else:
+            counts = {'inserted': loader.load()}
+    return counts, time.perf_counter() - start
+
+
+def load_file_in_thread(loader, upsert=False):
+    try:
+        return load_file(loader, upsert)
+    finally:
+        # У каждого рабочего потока своё соединение с базой.
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Загрузка всех CSV-файлов с учётом зависимостей между ними"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=DATA_DIR, type=type(DATA_DIR),
+            help='Папка с CSV-файлами.',
+        )
+        parser.add_argument(
+            '--batch-size', default=DEFAULT_BATCH_SIZE, type=int,
+            help='Число строк в одной пачке bulk_create.',
+        )
+        parser.add_argument(
+            '--workers', default=3, type=int,
+            help='Число параллельно загружаемых независимых файлов.',
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Добавить новые и обновить изменённые строки.',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stages = [
+            [loader_class(options['path'], options['batch_size'])
+             for loader_class in stage]
+            for stage in loading_stages()
+        ]
+        self.validate([loader for stage in stages for loader in stage])
+
+        workers = options['workers']
+        if connection.vendor == 'sqlite':
+            # SQLite допускает только одну пишущую транзакцию.
+            workers = 1
+        try:
+            for stage in stages:
+                self.load_stage(stage, workers, options['upsert'])
+        except (CSVLoadError, IntegrityError, OSError) as error:
+            raise CommandError(error)
+        self.stdout.write(f'Всего: {time.perf_counter() - start:.2f} с.')
+
+    def validate(self, loaders):
+        try:
+            errors = validate_files(loaders)
+        except (CSVLoadError, OSError) as error:
+            raise CommandError(error)
+        if errors:
+            raise CommandError(
+                'Данные не прошли проверку:\n' + '\n'.join(errors)
+            )
+
+    def load_stage(self, stage, workers, upsert):
+        """Загружает независимые файлы этапа, параллельно если можно."""
+        pending = []
+        for loader in stage:
+            if not upsert and loader.is_loaded():
+                self.stdout.write(f'{loader.filename}: данные уже загружены.')
+            else:
+                pending.append(loader)
+        if workers > 1 and len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    partial(load_file_in_thread, upsert=upsert), pending
+                ))
+        else:
+            results = [load_file(loader, upsert) for loader in pending]
+        for loader, (counts, elapsed) in zip(pending, results):
+            self.stdout.write(format_result(loader, counts, elapsed))
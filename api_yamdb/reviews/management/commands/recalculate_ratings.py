@@ -0,0 +1,14 @@
+from django.core.management import BaseCommand
+
+from reviews.models import Title
+from reviews.ratings import recalculate_ratings
+from reviews.signals import bulk_changed
+
+
+class Command(BaseCommand):
+    help = "Пересчёт рейтинга произведений по отзывам"
+
+    def handle(self, *args, **options):
+        updated = recalculate_ratings()
+        bulk_changed.send(sender=Title)
+        self.stdout.write(f'Пересчитан рейтинг произведений: {updated}.')
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management import BaseCommand
+
+from reviews.outbox import purge_sent, send_pending
+
+# Как часто команда с --loop удаляет старые отправленные письма, секунды.
+PURGE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Отправка писем из очереди OutgoingEmail"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Писем за одно соединение, по умолчанию '
+                 'EMAIL_OUTBOX_BATCH_SIZE.',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а проверять очередь каждые --interval '
+                 'секунд.',
+        )
+        parser.add_argument('--interval', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        purged_at = None
+        while True:
+            if purged_at is None or (
+                time.monotonic() - purged_at > PURGE_INTERVAL
+            ):
+                purged = purge_sent()
+                purged_at = time.monotonic()
+                if purged:
+                    self.stdout.write(
+                        f'Удалено старых отправленных писем: {purged}.'
+                    )
+            sent, failed = send_pending(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, отложено: {failed}.'
+                )
+            if not options['loop'] and not sent:
+                break
+            if not sent:
+                time.sleep(options['interval'])
+        self.stdout.write(
+            f'Всего отправлено: {total_sent}, отложено: {total_failed}.'
+        )
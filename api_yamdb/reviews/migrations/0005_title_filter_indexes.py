@@ -0,0 +1,22 @@
+# Generated by Django 3.2 on 2026-10-18 19:19
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_review_comment_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year'], name='title_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='title_name_upper_idx'),
+        ),
+    ]
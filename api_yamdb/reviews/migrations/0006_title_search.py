@@ -0,0 +1,61 @@
+from django.db import migrations
+
+SQLITE_CREATE = (
+    'CREATE VIRTUAL TABLE reviews_title_search USING fts5('
+    'name, description, category, genres)'
+)
+SQLITE_FILL = (
+    'INSERT INTO reviews_title_search (rowid, name, description, category, '
+    'genres) '
+    "SELECT t.id, t.name, COALESCE(t.description, ''), COALESCE(c.name, ''), "
+    "COALESCE((SELECT group_concat(g.name, ' ') FROM reviews_title_genre tg "
+    'JOIN reviews_genre g ON g.id = tg.genre_id WHERE tg.title_id = t.id), '
+    "'') "
+    'FROM reviews_title t LEFT JOIN reviews_category c ON c.id = t.category_id'
+)
+POSTGRESQL_CREATE = (
+    'CREATE TABLE reviews_title_search ('
+    'title_id bigint PRIMARY KEY, '
+    'document tsvector NOT NULL)',
+    'CREATE INDEX reviews_title_search_document_idx '
+    'ON reviews_title_search USING GIN (document)',
+)
+POSTGRESQL_FILL = (
+    'INSERT INTO reviews_title_search (title_id, document) '
+    'SELECT t.id, '
+    "setweight(to_tsvector('russian', t.name), 'A') || "
+    "setweight(to_tsvector('russian', COALESCE(c.name, '') || ' ' || "
+    "COALESCE((SELECT string_agg(g.name, ' ') FROM reviews_title_genre tg "
+    'JOIN reviews_genre g ON g.id = tg.genre_id WHERE tg.title_id = t.id), '
+    "'')), 'B') || "
+    "setweight(to_tsvector('russian', COALESCE(t.description, '')), 'C') "
+    'FROM reviews_title t LEFT JOIN reviews_category c ON c.id = t.category_id'
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements = (SQLITE_CREATE, SQLITE_FILL)
+    elif vendor == 'postgresql':
+        statements = POSTGRESQL_CREATE + (POSTGRESQL_FILL,)
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE reviews_title_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
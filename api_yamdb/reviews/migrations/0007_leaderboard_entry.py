@@ -0,0 +1,76 @@
+# Generated by Django 3.2 on 2026-10-18 19:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_leaderboards(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    LeaderboardEntry = apps.get_model('reviews', 'LeaderboardEntry')
+    prior_count = settings.RATING_PRIOR_COUNT
+    prior_sum = prior_count * settings.RATING_PRIOR_SCORE
+    titles = {}
+    entries = []
+    for pk, category_id, rating_sum, rating_count in (
+        Title.objects.values_list(
+            'pk', 'category_id', 'rating_sum', 'rating_count'
+        ).iterator()
+    ):
+        titles[pk] = {
+            'category_id': category_id,
+            'rating_count': rating_count,
+            'weighted_rating': (
+                (rating_sum + prior_sum) / (rating_count + prior_count)
+            ),
+        }
+        entries.append(LeaderboardEntry(title_id=pk, **titles[pk]))
+    for title_id, genre_id in Title.genre.through.objects.values_list(
+        'title_id', 'genre_id'
+    ).iterator():
+        entries.append(LeaderboardEntry(
+            title_id=title_id, genre_id=genre_id, **titles[title_id]
+        ))
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('weighted_rating', models.FloatField(verbose_name='Байесовский рейтинг')),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reviews.category')),
+                ('genre', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.genre')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.title')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['genre', '-weighted_rating', 'title'], name='leaderboard_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['genre', 'category', '-weighted_rating', 'title'], name='leaderboard_cat_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['genre', '-rating_count', 'title'], name='leaderboard_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['genre', 'category', '-rating_count', 'title'], name='leaderboard_cat_count_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='unique_leaderboard_title_genre'),
+        ),
+        migrations.RunPython(fill_leaderboards, migrations.RunPython.noop),
+    ]
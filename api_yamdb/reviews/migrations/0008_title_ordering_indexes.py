@@ -0,0 +1,46 @@
+# Generated by Django 3.2 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+
+def create_rating_desc_index(apps, schema_editor):
+    # PostgreSQL хранит NULL в конце индекса по возрастанию, поэтому для
+    # сортировки -rating без рейтинга в конце нужен отдельный индекс.
+    # В SQLite NULL меньше любого числа, и title_rating_idx подходит.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX title_rating_desc_idx ON reviews_title '
+            '(rating DESC NULLS LAST, id DESC)'
+        )
+
+
+def drop_rating_desc_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX title_rating_desc_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_leaderboard_entry'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_year_idx',
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating', 'id'], name='title_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating_count', 'id'], name='title_rating_count_idx'),
+        ),
+        migrations.RunPython(create_rating_desc_index, drop_rating_desc_index),
+    ]
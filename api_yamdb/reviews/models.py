@@ -3,7 +3,11 @@ import datetime
 from .validators import validate_username
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+SCORES = range(1, 11)
 
 
 class Category(models.Model):
@@ -79,14 +83,82 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Категория',
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок',
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок',
+    )
+    rating = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Рейтинг',
+    )
+    # Распределение оценок: число отзывов с оценкой 1, 2, ..., 10.
+    score_1 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 1',
+    )
+    score_2 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 2',
+    )
+    score_3 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 3',
+    )
+    score_4 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 4',
+    )
+    score_5 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 5',
+    )
+    score_6 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 6',
+    )
+    score_7 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 7',
+    )
+    score_8 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 8',
+    )
+    score_9 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 9',
+    )
+    score_10 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 10',
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = (
+            models.Index(fields=['year', 'id'], name='title_year_idx'),
+            models.Index(Upper('name'), name='title_name_upper_idx'),
+            models.Index(fields=['rating', 'id'], name='title_rating_idx'),
+            models.Index(
+                fields=['rating_count', 'id'], name='title_rating_count_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
 
+    @property
+    def score_distribution(self):
+        return {
+            score: getattr(self, f'score_{score}') for score in SCORES
+        }
+
 
 class TitleGenre(models.Model):
     """Модель для связи произведений и жанров"""
@@ -107,6 +179,63 @@ class TitleGenre(models.Model):
         return f'{self.title} {self.genre}'
 
 
+class LeaderboardEntry(models.Model):
+    """Строка топов произведений.
+
+    Для каждого произведения хранится строка без жанра (общий топ и топ
+    категории) и по строке на каждый его жанр. Оценки копируются из
+    произведения при каждом изменении отзывов, поэтому топ читается по
+    индексу, без сортировки всего каталога.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+    )
+    rating_count = models.PositiveIntegerField(default=0)
+    weighted_rating = models.FloatField(
+        verbose_name='Байесовский рейтинг',
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=['title', 'genre'],
+                name='unique_leaderboard_title_genre'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=['genre', '-weighted_rating', 'title'],
+                name='leaderboard_rating_idx'
+            ),
+            models.Index(
+                fields=['genre', 'category', '-weighted_rating', 'title'],
+                name='leaderboard_cat_rating_idx'
+            ),
+            models.Index(
+                fields=['genre', '-rating_count', 'title'],
+                name='leaderboard_count_idx'
+            ),
+            models.Index(
+                fields=['genre', 'category', '-rating_count', 'title'],
+                name='leaderboard_cat_count_idx'
+            ),
+        )
+
+
 USER = 'user'
 MODERATOR = 'moderator'
 ADMIN = 'admin'
@@ -160,6 +289,13 @@ class User(AbstractUser):
     def is_moderator(self):
         return self.role == MODERATOR
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Значения из базы: по ним сигналы определяют, что изменилось.
+        user = super().from_db(db, field_names, values)
+        user._loaded_values = dict(zip(field_names, values))
+        return user
+
     def __str__(self):
         return self.username
 
@@ -202,6 +338,24 @@ class Review(models.Model):
                 name='unique_author_title'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженную оценку для пересчёта рейтинга."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и рейтинг произведения в одной транзакции."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -220,3 +374,44 @@ class Comment(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        )
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку.
+
+    Письма отправляет команда send_emails; неудачная попытка откладывает
+    письмо на время, которое удваивается с каждой попыткой.
+    """
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    to = models.EmailField('Получатель', max_length=254)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    send_after = models.DateTimeField(
+        'Отправить после', default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = (
+            models.Index(
+                fields=['send_after', 'id'],
+                condition=models.Q(sent_at__isnull=True),
+                name='outgoing_email_pending_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
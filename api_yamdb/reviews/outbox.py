@@ -0,0 +1,131 @@
+"""Очередь исходящих писем.
+
+С EMAIL_OUTBOX_ENABLED = True письма не отправляются в запросе, а
+сохраняются в таблицу OutgoingEmail; команда send_emails отправляет их
+пачками через одно соединение с почтовым сервером. Пачка занимается
+короткой транзакцией: send_after писем сдвигается на EMAIL_OUTBOX_LEASE
+секунд, и сама отправка идёт уже вне транзакции. Если обработчик упадёт,
+письма вернутся в очередь по истечении этого срока. Неудачная попытка
+откладывает письмо на EMAIL_OUTBOX_RETRY_DELAY * 2 ** (попытка - 1)
+секунд, после EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо остаётся в таблице
+с последней ошибкой. Отправленные письма удаляются через
+EMAIL_OUTBOX_RETENTION_DAYS дней.
+"""
+import datetime as dt
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    """Ставит письмо в очередь или, если очередь выключена, отправляет."""
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    if not settings.EMAIL_OUTBOX_ENABLED:
+        send_mail(subject, body, from_email, [to], fail_silently=False)
+        return None
+    return OutgoingEmail.objects.create(
+        subject=subject, body=body, from_email=from_email, to=to
+    )
+
+
+def retry_delay(attempts):
+    return dt.timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def pending_emails():
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        send_after__lte=timezone.now(),
+        attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    ).order_by('send_after', 'id')
+
+
+def send_batch(emails):
+    """Отправляет письма через одно соединение, возвращает неотправленные."""
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            email.last_error = repr(error)
+        return emails
+    failed = []
+    try:
+        for email in emails:
+            try:
+                connection.send_messages([EmailMessage(
+                    email.subject, email.body, email.from_email, [email.to],
+                    connection=connection,
+                )])
+            except Exception as error:
+                email.last_error = repr(error)
+                failed.append(email)
+            else:
+                email.sent_at = timezone.now()
+    finally:
+        connection.close()
+    return failed
+
+
+def claim_emails(batch_size):
+    """Занимает пачку готовых писем на EMAIL_OUTBOX_LEASE секунд.
+
+    Письма блокируются (в PostgreSQL — с SKIP LOCKED) только на время
+    короткой транзакции, поэтому несколько обработчиков не займут одно
+    письмо дважды. Попытка засчитывается сразу: письмо, на котором
+    обработчик падает, не будет повторяться бесконечно.
+    """
+    with transaction.atomic():
+        emails = list(
+            pending_emails().select_for_update(skip_locked=True)[:batch_size]
+        )
+        if emails:
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in emails]
+            ).update(
+                attempts=F('attempts') + 1,
+                send_after=timezone.now() + dt.timedelta(
+                    seconds=settings.EMAIL_OUTBOX_LEASE
+                ),
+            )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def send_pending(batch_size=None):
+    """Отправляет одну пачку готовых к отправке писем.
+
+    Возвращает число отправленных и неотправленных писем.
+    """
+    emails = claim_emails(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+    failed = send_batch(emails)
+    now = timezone.now()
+    for email in failed:
+        email.send_after = now + retry_delay(email.attempts)
+    OutgoingEmail.objects.bulk_update(
+        emails, ('send_after', 'last_error', 'sent_at')
+    )
+    return len(emails) - len(failed), len(failed)
+
+
+def purge_sent():
+    """Удаляет письма, отправленные раньше EMAIL_OUTBOX_RETENTION_DAYS дней.
+
+    Возвращает число удалённых писем.
+    """
+    deleted, _ = OutgoingEmail.objects.filter(
+        sent_at__lt=timezone.now() - dt.timedelta(
+            days=settings.EMAIL_OUTBOX_RETENTION_DAYS
+        )
+    ).delete()
+    return deleted
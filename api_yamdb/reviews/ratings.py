@@ -0,0 +1,69 @@
+from django.db.models import (Avg, Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Subquery, Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .leaderboards import refresh_entries
+from .models import SCORES, LeaderboardEntry, Review, Title
+
+
+def rating_expression(rating_sum, rating_count):
+    """Средняя оценка из суммы и количества, NULL при отсутствии оценок."""
+    return ExpressionWrapper(
+        Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+        output_field=FloatField(),
+    )
+
+
+def update_title_rating(title_id, added=None, removed=None):
+    """Инкрементально изменяет рейтинг произведения одним UPDATE.
+
+    added — оценка нового отзыва, removed — оценка удалённого; при
+    изменении оценки передаются обе.
+    """
+    rating_sum = F('rating_sum') + (added or 0) - (removed or 0)
+    rating_count = F('rating_count') + int(added is not None) - int(
+        removed is not None
+    )
+    distribution = {}
+    if added != removed:
+        if added is not None:
+            distribution[f'score_{added}'] = F(f'score_{added}') + 1
+        if removed is not None:
+            distribution[f'score_{removed}'] = F(f'score_{removed}') - 1
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=rating_expression(rating_sum, rating_count),
+        **distribution,
+    )
+    refresh_entries(LeaderboardEntry.objects.filter(title_id=title_id))
+
+
+def recalculate_ratings(queryset=None):
+    """Пересчитывает рейтинг и распределение оценок по отзывам с нуля."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    updated = queryset.update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0,
+        ),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            0,
+        ),
+        rating=Subquery(reviews.annotate(avg=Avg('score')).values('avg')),
+        **{
+            f'score_{score}': Coalesce(Subquery(
+                reviews.filter(score=score).annotate(
+                    total=Count('pk')
+                ).values('total')
+            ), 0)
+            for score in SCORES
+        },
+    )
+    refresh_entries(LeaderboardEntry.objects.filter(title__in=queryset))
+    return updated
@@ -0,0 +1,180 @@
+"""Полнотекстовый поиск произведений.
+
+Индекс хранится в отдельной таблице reviews_title_search: виртуальная
+таблица FTS5 в SQLite и таблица с tsvector и GIN-индексом в PostgreSQL.
+В индекс попадают название, описание, категория и жанры произведения;
+сигналы из signals.py обновляют его при изменении этих данных. Для других
+СУБД поиск выполняется через LIKE без ранжирования.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TABLE = 'reviews_title_search'
+# Словарь PostgreSQL: стемминг для русских названий и описаний.
+TS_CONFIG = 'russian'
+MAX_TERMS = 10
+BATCH_SIZE = 500
+
+GENRES_SQL = {
+    'sqlite': (
+        "SELECT group_concat(g.name, ' ') FROM reviews_title_genre tg "
+        "JOIN reviews_genre g ON g.id = tg.genre_id "
+        "WHERE tg.title_id = t.id"
+    ),
+    'postgresql': (
+        "SELECT string_agg(g.name, ' ') FROM reviews_title_genre tg "
+        "JOIN reviews_genre g ON g.id = tg.genre_id "
+        "WHERE tg.title_id = t.id"
+    ),
+}
+
+
+def search_terms(value):
+    """Слова запроса без операторов FTS, не больше MAX_TERMS."""
+    return re.findall(r'\w+', value.lower())[:MAX_TERMS]
+
+
+class SQLiteSearch:
+    """FTS5, ранжирование по bm25 с весами колонок."""
+
+    key = 'rowid'
+
+    def index_sql(self, where=''):
+        return (
+            f'INSERT INTO {TABLE} (rowid, name, description, category, '
+            f'genres) '
+            f"SELECT t.id, t.name, COALESCE(t.description, ''), "
+            f"COALESCE(c.name, ''), "
+            f"COALESCE(({GENRES_SQL['sqlite']}), '') "
+            f'FROM reviews_title t '
+            f'LEFT JOIN reviews_category c ON c.id = t.category_id {where}'
+        )
+
+    def search(self, queryset, terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        matched = RawSQL(
+            f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', (match,)
+        )
+        # bm25 тем меньше, чем выше релевантность. Веса: название,
+        # описание, категория, жанры.
+        rank = RawSQL(
+            f'SELECT bm25({TABLE}, 10.0, 1.0, 5.0, 5.0) FROM {TABLE} '
+            f'WHERE {TABLE} MATCH %s AND rowid = reviews_title.id',
+            (match,),
+        )
+        return queryset.filter(pk__in=matched).annotate(
+            search_rank=rank
+        ).order_by('search_rank', 'id')
+
+
+class PostgreSQLSearch:
+    """tsvector с весами A (название), B (категория и жанры), C
+    (описание), ранжирование по ts_rank."""
+
+    key = 'title_id'
+
+    def index_sql(self, where=''):
+        return (
+            f'INSERT INTO {TABLE} (title_id, document) '
+            f"SELECT t.id, "
+            f"setweight(to_tsvector('{TS_CONFIG}', t.name), 'A') || "
+            f"setweight(to_tsvector('{TS_CONFIG}', "
+            f"COALESCE(c.name, '') || ' ' || "
+            f"COALESCE(({GENRES_SQL['postgresql']}), '')), 'B') || "
+            f"setweight(to_tsvector('{TS_CONFIG}', "
+            f"COALESCE(t.description, '')), 'C') "
+            f'FROM reviews_title t '
+            f'LEFT JOIN reviews_category c ON c.id = t.category_id {where}'
+        )
+
+    def search(self, queryset, terms):
+        query = ' & '.join(f'{term}:*' for term in terms)
+        matched = RawSQL(
+            f'SELECT title_id FROM {TABLE} '
+            f"WHERE document @@ to_tsquery('{TS_CONFIG}', %s)",
+            (query,),
+        )
+        rank = RawSQL(
+            f"SELECT ts_rank(document, to_tsquery('{TS_CONFIG}', %s)) "
+            f'FROM {TABLE} WHERE title_id = reviews_title.id',
+            (query,),
+        )
+        return queryset.filter(pk__in=matched).annotate(
+            search_rank=rank
+        ).order_by('-search_rank', 'id')
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearch(),
+    'postgresql': PostgreSQLSearch(),
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor)
+
+
+def in_batches(title_ids):
+    title_ids = list(title_ids)
+    for start in range(0, len(title_ids), BATCH_SIZE):
+        batch = title_ids[start:start + BATCH_SIZE]
+        yield batch, '({})'.format(', '.join(['%s'] * len(batch)))
+
+
+def index_titles(title_ids):
+    """Обновляет записи индекса для произведений title_ids."""
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        for batch, placeholders in in_batches(title_ids):
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE {backend.key} IN {placeholders}',
+                batch,
+            )
+            cursor.execute(
+                backend.index_sql(f'WHERE t.id IN {placeholders}'), batch
+            )
+
+
+def remove_titles(title_ids):
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        for batch, placeholders in in_batches(title_ids):
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE {backend.key} IN {placeholders}',
+                batch,
+            )
+
+
+def rebuild_index():
+    """Строит индекс заново, например после массовой загрузки."""
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(backend.index_sql())
+
+
+def search_titles(queryset, value):
+    """Произведения, подходящие под запрос, от более релевантных к менее."""
+    terms = search_terms(value)
+    if not terms:
+        return queryset.none()
+    backend = get_backend()
+    if backend is not None:
+        return backend.search(queryset, terms)
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(name__icontains=term) | Q(description__icontains=term)
+            | Q(category__name__icontains=term)
+            | Q(genre__name__icontains=term)
+        )
+    return queryset.filter(condition).distinct()
@@ -0,0 +1,161 @@
+import threading
+
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+
+from .leaderboards import add_entries, rebuild_leaderboards
+from .models import Category, Genre, LeaderboardEntry, Review, Title
+from .ratings import update_title_rating
+from .search import index_titles, rebuild_index, remove_titles
+
+# Массовое изменение записей модели sender в обход сигналов моделей
+# (bulk_create, bulk_update, update), например при загрузке CSV.
+bulk_changed = Signal()
+# Изменение пользователей с id из pks в обход сигналов моделей: права из
+# выданных им токенов нужно перепроверить.
+access_changed = Signal()
+
+# id произведений, которые удаляются в текущем потоке: их отзывы удаляются
+# каскадом, и пересчитывать рейтинг удаляемого произведения не нужно.
+_deleting = threading.local()
+
+
+def deleting_title_ids():
+    if not hasattr(_deleting, 'title_ids'):
+        _deleting.title_ids = set()
+    return _deleting.title_ids
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    """Учитывает новую или изменённую оценку в рейтинге произведения."""
+    if created:
+        update_title_rating(instance.title_id, added=instance.score)
+    else:
+        loaded = getattr(instance, '_loaded_values', {})
+        previous_score = loaded.get('score', instance.score)
+        previous_title_id = loaded.get('title_id', instance.title_id)
+        if previous_title_id != instance.title_id:
+            update_title_rating(previous_title_id, removed=previous_score)
+            update_title_rating(instance.title_id, added=instance.score)
+        elif previous_score != instance.score:
+            update_title_rating(
+                instance.title_id, added=instance.score,
+                removed=previous_score,
+            )
+    instance._loaded_values = {
+        'score': instance.score,
+        'title_id': instance.title_id,
+    }
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Исключает оценку удалённого отзыва из рейтинга произведения."""
+    if instance.title_id not in deleting_title_ids():
+        update_title_rating(instance.title_id, removed=instance.score)
+
+
+@receiver(pre_delete, sender=Title)
+def title_deleting(sender, instance, **kwargs):
+    deleting_title_ids().add(instance.pk)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, **kwargs):
+    """Обновляет запись произведения в поисковом индексе."""
+    index_titles([instance.pk])
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    deleting_title_ids().discard(instance.pk)
+    remove_titles([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def search_group_saved(sender, instance, created, **kwargs):
+    """Название категории или жанра входит в индекс его произведений."""
+    if not created:
+        index_titles(instance.titles.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def search_group_deleting(sender, instance, **kwargs):
+    instance._search_title_ids = list(
+        instance.titles.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def search_group_deleted(sender, instance, **kwargs):
+    index_titles(getattr(instance, '_search_title_ids', ()))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Переиндексирует произведения, у которых изменились жанры."""
+    if action == 'pre_clear' and reverse:
+        instance._search_title_ids = list(
+            instance.titles.values_list('pk', flat=True)
+        )
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        index_titles([instance.pk])
+    elif action == 'post_clear':
+        index_titles(getattr(instance, '_search_title_ids', ()))
+    else:
+        index_titles(pk_set)
+
+
+@receiver(bulk_changed)
+def search_bulk_changed(sender, **kwargs):
+    if sender in (Title, Title.genre.through, Category, Genre):
+        rebuild_index()
+
+
+@receiver(post_save, sender=Title)
+def leaderboard_title_saved(sender, instance, created, **kwargs):
+    """Заводит строку топов нового произведения, переносит категорию."""
+    if created:
+        add_entries([(instance.pk, None)])
+    else:
+        LeaderboardEntry.objects.filter(title_id=instance.pk).exclude(
+            category_id=instance.category_id
+        ).update(category_id=instance.category_id)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def leaderboard_genres_changed(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    """Добавляет и удаляет строки топов по жанрам."""
+    if action == 'post_add':
+        if reverse:
+            add_entries((title_id, instance.pk) for title_id in pk_set)
+        else:
+            add_entries((instance.pk, genre_id) for genre_id in pk_set)
+        return
+    if reverse:
+        entries = LeaderboardEntry.objects.filter(genre_id=instance.pk)
+        lookup = 'title_id__in'
+    else:
+        entries = LeaderboardEntry.objects.filter(
+            title_id=instance.pk, genre__isnull=False
+        )
+        lookup = 'genre_id__in'
+    if action == 'post_remove':
+        entries.filter(**{lookup: pk_set}).delete()
+    elif action == 'post_clear':
+        entries.delete()
+
+
+@receiver(bulk_changed)
+def leaderboard_bulk_changed(sender, **kwargs):
+    if sender in (Title, Title.genre.through, Category, Genre):
+        rebuild_leaderboards()
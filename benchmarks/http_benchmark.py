@@ -0,0 +1,263 @@
+"""Нагрузочный прогон всех эндпоинтов API во встроенном WSGI-клиенте.
+
+Создаёт отдельную тестовую базу, наполняет её командой generate_data и
+для каждого маршрута из api/urls.py измеряет задержку (p50/p95/p99),
+запросы в секунду и число SQL-запросов на запрос. Каждый сценарий
+прогоняется с холодным кешем (кеш очищается перед каждым запросом, вне
+замера) и с тёплым, когда ответы каталога и пользователи берутся из кеша.
+Результат печатается таблицей и, с --output, сохраняется в JSON для
+сравнения между коммитами.
+
+Запуск из корня репозитория:
+    python benchmarks/http_benchmark.py --output bench.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+from io import StringIO
+from itertools import count
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.utils import (create_test_database,  # noqa: E402
+                              destroy_test_database, median, percentile,
+                              setup_django)
+
+setup_django()
+
+from django.contrib.auth.tokens import default_token_generator  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.core.paginator import UnorderedObjectListWarning  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from reviews.models import (Category, Comment, Genre, Review,  # noqa: E402
+                            Title, User)
+
+
+class QueryCounter:
+    """Считает SQL-запросы через execute_wrapper, без DEBUG."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def build_scenarios(logins):
+    """Возвращает {имя: функция(client, n) -> response} для всех маршрутов.
+
+    logins — сколько новых пользователей подготовить для сценария первого
+    входа: каждый запрос этого сценария получает токен для нового
+    пользователя, как при волне входов после рассылки.
+    """
+    title = Title.objects.order_by('-rating_count').first()
+    review = Review.objects.filter(title=title).order_by('-id').first()
+    comment = Comment.objects.filter(review=review).first() or (
+        Comment.objects.create(review=review, author=review.author,
+                               text='text')
+    )
+    category = Category.objects.first()
+    genre = Genre.objects.first()
+    user = User.objects.filter(role='user').first()
+    admin = User.objects.create_user(
+        username='bench_admin', email='bench_admin@yamdb.fake', role='admin'
+    )
+    token = f'Bearer {AccessToken.for_user(admin)}'
+    confirmation_code = default_token_generator.make_token(user)
+    signups = count()
+    User.objects.bulk_create(
+        User(username=f'bench_login{number}',
+             email=f'bench_login{number}@yamdb.fake', is_active=False)
+        for number in range(logins)
+    )
+    first_logins = iter([
+        {
+            'username': new_user.username,
+            'confirmation_code': default_token_generator.make_token(new_user),
+        }
+        for new_user in User.objects.filter(
+            username__startswith='bench_login'
+        ).order_by('id')
+    ])
+
+    reviews = f'/api/v1/titles/{title.id}/reviews/'
+    comments = f'{reviews}{review.id}/comments/'
+    anonymous = {
+        'titles-list': '/api/v1/titles/',
+        'titles-list ?category': f'/api/v1/titles/?category={category.slug}',
+        'titles-list ?genre': f'/api/v1/titles/?genre={genre.slug}',
+        'titles-list ?name': f'/api/v1/titles/?name={title.name}',
+        'titles-list ?year': f'/api/v1/titles/?year={title.year}',
+        'titles-list ?search': '/api/v1/titles/?search=произведение',
+        'titles-list ?page=last': '/api/v1/titles/?page=last',
+        'titles-list ?fields': '/api/v1/titles/?fields=id,name',
+        'titles-detail': f'/api/v1/titles/{title.id}/',
+        'titles-top': '/api/v1/titles/top/',
+        'titles-top ?genre': f'/api/v1/titles/top/?genre={genre.slug}',
+        'titles-most-reviewed': '/api/v1/titles/most-reviewed/',
+        'category-list': '/api/v1/categories/',
+        'category-list ?search': f'/api/v1/categories/?search={category.name}',
+        'genres-list': '/api/v1/genres/',
+        'reviews-list': reviews,
+        'reviews-list ?page=last': f'{reviews}?page=last',
+        'reviews-list ?pagination=cursor': f'{reviews}?pagination=cursor',
+        'reviews-detail': f'{reviews}{review.id}/',
+        'comments-list': comments,
+        'comments-detail': f'{comments}{comment.id}/',
+    }
+    authorized = {
+        'users-list': '/api/v1/users/',
+        'users-detail': f'/api/v1/users/{user.username}/',
+        'me': '/api/v1/users/me/',
+    }
+
+    scenarios = {
+        name: (lambda url: lambda client, n: client.get(url))(url)
+        for name, url in anonymous.items()
+    }
+    scenarios.update({
+        name: (lambda url: lambda client, n: client.get(
+            url, HTTP_AUTHORIZATION=token
+        ))(url)
+        for name, url in authorized.items()
+    })
+
+    def signup(client, n):
+        number = next(signups)
+        return client.post('/api/v1/auth/signup/', {
+            'username': f'bench_signup{number}',
+            'email': f'bench_signup{number}@yamdb.fake',
+        })
+
+    def issue_token(client, n):
+        return client.post('/api/v1/auth/token/', {
+            'username': user.username,
+            'confirmation_code': confirmation_code,
+        })
+
+    def issue_first_token(client, n):
+        return client.post('/api/v1/auth/token/', next(first_logins))
+
+    scenarios['signup'] = signup
+    scenarios['token'] = issue_token
+    scenarios['token first-login'] = issue_first_token
+    return scenarios
+
+
+def run_scenario(client, scenario, requests, warmup, cold):
+    """cold — очищать кеш перед каждым запросом, иначе после прогрева
+    ответы каталога отдаются из кеша без SQL-запросов."""
+    for n in range(warmup):
+        scenario(client, n)
+    timings = []
+    queries = []
+    elapsed = 0
+    for n in range(requests):
+        if cold:
+            cache.clear()
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = scenario(client, n)
+        duration = time.perf_counter() - start
+        elapsed += duration
+        timings.append(duration * 1000)
+        queries.append(counter.count)
+        assert response.status_code < 400, (
+            f'{response.status_code}: {response.content[:200]}'
+        )
+    return {
+        'requests': requests,
+        'rps': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': median(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=50000)
+    parser.add_argument('--comments', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--only', nargs='*',
+                        help='Запустить только указанные сценарии.')
+    parser.add_argument(
+        '--cache', choices=('cold', 'warm', 'both'), default='both',
+        help='Состояние кеша: очищать его перед каждым запросом (cold), '
+             'использовать прогретый (warm) или прогнать оба варианта.',
+    )
+    parser.add_argument('--output', type=Path,
+                        help='Файл для результатов в JSON.')
+    options = parser.parse_args()
+
+    warnings.simplefilter('ignore', UnorderedObjectListWarning)
+    setup_test_environment()
+    old_name = create_test_database()
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            call_command(
+                'generate_data', Path(data_dir), load=True,
+                users=options.users, titles=options.titles,
+                reviews=options.reviews, comments=options.comments,
+                seed=options.seed, stdout=StringIO(),
+            )
+        modes = (
+            ('cold', 'warm') if options.cache == 'both' else (options.cache,)
+        )
+        scenarios = build_scenarios(
+            (options.requests + options.warmup) * len(modes)
+        )
+        client = APIClient()
+        results = {}
+        for name, scenario in scenarios.items():
+            if options.only and name not in options.only:
+                continue
+            results[name] = {}
+            for mode in modes:
+                results[name][mode] = row = run_scenario(
+                    client, scenario, options.requests, options.warmup,
+                    cold=mode == 'cold',
+                )
+                label = f'{name} [{mode}]'
+                print(
+                    f'{label:<41} {row["rps"]:>8} rps  '
+                    f'p50 {row["p50_ms"]:>8} ms  '
+                    f'p95 {row["p95_ms"]:>8} ms  p99 {row["p99_ms"]:>8} ms  '
+                    f'{row["queries"]:>4} SQL'
+                )
+    finally:
+        destroy_test_database(old_name)
+
+    if options.output:
+        report = {
+            'dataset': {
+                'users': options.users, 'titles': options.titles,
+                'reviews': options.reviews, 'comments': options.comments,
+                'seed': options.seed,
+            },
+            'results': results,
+        }
+        options.output.write_text(
+            json.dumps(report, indent=2, ensure_ascii=False), 'utf-8'
+        )
+
+
+if __name__ == '__main__':
+    main()
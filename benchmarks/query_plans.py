@@ -0,0 +1,147 @@
+"""Планы и время запросов каталога с индексами и без них.
+
+Создаёт отдельную тестовую базу, наполняет её синтетическими данными
+и для каждого типового запроса API печатает EXPLAIN и медианное время
+выполнения до (без индексов) и после (с индексами из миграций).
+
+Запуск из корня репозитория:
+    python benchmarks/query_plans.py --reviews 1000000
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.utils import (create_test_database,  # noqa: E402
+                              destroy_test_database, measure, median,
+                              setup_django)
+
+setup_django()
+
+from django.db import connection, transaction  # noqa: E402
+
+from api.filters import TitleFilter, TitleOrderingFilter  # noqa: E402
+from reviews.models import Comment, Review, Title, User  # noqa: E402
+
+INDEXED_MODELS = (Title, Review, Comment)
+BATCH_SIZE = 10000
+
+
+def fill_database(options):
+    rng = random.Random(options.seed)
+    users = options.users
+    titles = options.titles
+    reviews_per_title = options.reviews // titles
+    assert reviews_per_title <= users, (
+        'Число отзывов на произведение не может превышать число '
+        'пользователей: у пары (автор, произведение) один отзыв.'
+    )
+    with transaction.atomic():
+        User.objects.bulk_create(
+            (User(id=idx, username=f'user{idx}', email=f'user{idx}@yamdb.fake')
+             for idx in range(1, users + 1)),
+            batch_size=BATCH_SIZE,
+        )
+        Title.objects.bulk_create(
+            (Title(id=idx, name=f'Title {idx}', year=rng.randint(1900, 2020))
+             for idx in range(1, titles + 1)),
+            batch_size=BATCH_SIZE,
+        )
+    review_id = 0
+    batch = []
+    for title_id in range(1, titles + 1):
+        for author_id in rng.sample(range(1, users + 1), reviews_per_title):
+            review_id += 1
+            batch.append(Review(
+                id=review_id, title_id=title_id, author_id=author_id,
+                text='text', score=rng.randint(1, 10),
+            ))
+        if len(batch) >= BATCH_SIZE:
+            Review.objects.bulk_create(batch)
+            batch = []
+    Review.objects.bulk_create(batch)
+    Comment.objects.bulk_create(
+        (Comment(review_id=rng.randint(1, review_id // 100 or 1),
+                 author_id=rng.randint(1, users), text='text')
+         for _ in range(options.comments)),
+        batch_size=BATCH_SIZE,
+    )
+    return review_id
+
+
+def build_queries(rng, options):
+    title_id = rng.randint(1, options.titles)
+    review_id = Review.objects.filter(title_id=title_id).first().id
+    year = Title.objects.get(pk=title_id).year
+    return {
+        'titles ?year=': lambda: TitleFilter(
+            {'year': year}, queryset=Title.objects.all()
+        ).qs[:10],
+        'titles ?name=': lambda: TitleFilter(
+            {'name': f'title {title_id}'}, queryset=Title.objects.all()
+        ).qs[:10],
+        'titles ?ordering=-rating': lambda: Title.objects.order_by(
+            *TitleOrderingFilter().translate(['-rating'])
+        )[:10],
+        'titles ?ordering=-reviews_count': lambda: Title.objects.order_by(
+            *TitleOrderingFilter().translate(['-reviews_count'])
+        )[:10],
+        'reviews page': lambda: Review.objects.filter(
+            title_id=title_id
+        ).order_by('-pub_date', '-id')[:10],
+        'comments page': lambda: Comment.objects.filter(
+            review_id=review_id
+        ).order_by('-pub_date', '-id')[:10],
+    }
+
+
+def run_queries(queries, repeat):
+    results = {}
+    for name, build in queries.items():
+        queryset = build()
+        list(queryset)
+        timings = measure(lambda: list(build()), repeat)
+        results[name] = (queryset.explain(), median(timings))
+    return results
+
+
+def drop_indexes():
+    with connection.schema_editor() as editor:
+        for model in INDEXED_MODELS:
+            for index in model._meta.indexes:
+                editor.remove_index(model, index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--reviews', type=int, default=1000000)
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    options = parser.parse_args()
+
+    old_name = create_test_database()
+    try:
+        reviews = fill_database(options)
+        print(f'Отзывов в базе: {reviews}')
+        queries = build_queries(random.Random(options.seed), options)
+        after = run_queries(queries, options.repeat)
+        drop_indexes()
+        before = run_queries(queries, options.repeat)
+    finally:
+        destroy_test_database(old_name)
+
+    for name in queries:
+        plan_before, time_before = before[name]
+        plan_after, time_after = after[name]
+        print(f'\n== {name}: {time_before:.3f} ms -> {time_after:.3f} ms')
+        print(f'без индексов:\n{plan_before}')
+        print(f'с индексами:\n{plan_after}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(BASE_DIR, 'api_yamdb')
+
+
+def setup_django():
+    """Подключает проект и настраивает Django для запуска скрипта."""
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+
+
+def create_test_database():
+    """Создаёт отдельную тестовую базу с применёнными миграциями."""
+    from django.db import connection
+    return connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def destroy_test_database(old_name):
+    from django.db import connection
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func, repeat):
+    """Возвращает время выполнения func в миллисекундах для каждого запуска."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1,
+                       round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def median(values):
+    return statistics.median(values)
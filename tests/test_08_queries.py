@@ -0,0 +1,272 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+
+from api.serializers import SendCodeUserSerializer
+from reviews.models import Category, Comment, Genre, Review, Title
+from tests.utils import create_rated_titles
+
+
+def review_table_queries(queries):
+    return [
+        query for query in queries
+        if 'FROM "reviews_review"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08QueriesAPI:
+
+    def test_01_title_list_rating_in_single_query(self, client, admin,
+                                                  moderator):
+        create_rated_titles([admin, moderator], 10)
+        url = '/api/v1/titles/'
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert len(results) == 10
+        assert all(title['rating'] == 1 for title in results), (
+            f'Проверьте, что GET-запрос к `{url}` возвращает рейтинг '
+            'каждого произведения.'
+        )
+        assert not review_table_queries(context.captured_queries), (
+            f'Проверьте, что рейтинг в ответе на GET-запрос к `{url}` '
+            'вычисляется в запросе страницы, без отдельных запросов к '
+            'отзывам для каждого произведения.'
+        )
+
+    def test_02_title_detail_and_filter_rating(self, client, admin,
+                                               moderator):
+        titles = create_rated_titles([admin, moderator], 2)
+        url = f'/api/v1/titles/{titles[0].id}/'
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['rating'] == 1
+        assert not review_table_queries(context.captured_queries), (
+            f'Проверьте, что рейтинг в ответе на GET-запрос к `{url}` '
+            'вычисляется в основном запросе к базе данных.'
+        )
+
+        response = client.get('/api/v1/titles/?genre=drama&year=2000')
+        results = response.json()['results']
+        assert len(results) == 2
+        assert all(title['rating'] == 1 for title in results), (
+            'Проверьте, что рейтинг возвращается и для отфильтрованного '
+            'списка произведений.'
+        )
+
+    def test_03_title_list_constant_queries(self, client, admin):
+        url = '/api/v1/titles/'
+        query_counts = []
+        for count in (2, 10):
+            Title.objects.all().delete()
+            Category.objects.all().delete()
+            Genre.objects.all().delete()
+            create_rated_titles([admin], count)
+            for query in ('', '?genre=drama', '?category=films&year=2000'):
+                with CaptureQueriesContext(connection) as context:
+                    response = client.get(f'{url}{query}')
+                assert response.status_code == HTTPStatus.OK
+                results = response.json()['results']
+                assert len(results) == count
+                assert all(
+                    title['category']['slug'] == 'films'
+                    and title['genre'][0]['slug'] == 'drama'
+                    for title in results
+                )
+                query_counts.append(len(context.captured_queries))
+        assert query_counts == [3] * len(query_counts), (
+            f'Проверьте, что GET-запрос к `{url}` получает категории и жанры '
+            'произведений фиксированным числом запросов к базе данных, '
+            'независимо от размера страницы. Сейчас число запросов: '
+            f'{query_counts}.'
+        )
+
+    def test_04_review_and_comment_list_queries(self, client, admin,
+                                                moderator, user):
+        authors = [admin, moderator, user]
+        title = create_rated_titles(authors, 1)[0]
+        review = title.reviews.first()
+        for author in authors:
+            Comment.objects.create(review=review, author=author, text='text')
+
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert {item['author'] for item in results} == {
+            author.username for author in authors
+        }
+        assert all(item['title'] == title.name for item in results)
+        assert len(context.captured_queries) == 2, (
+            f'Проверьте, что GET-запрос к `{url}` получает авторов и '
+            'произведение вместе с отзывами: ожидается запрос страницы и '
+            'запрос количества для пагинации.'
+        )
+
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert {item['author'] for item in results} == {
+            author.username for author in authors
+        }
+        assert len(context.captured_queries) == 2, (
+            f'Проверьте, что GET-запрос к `{url}` получает авторов вместе '
+            'с комментариями: ожидается запрос страницы и запрос '
+            'количества для пагинации.'
+        )
+
+    def test_05_cursor_pagination(self, client, django_user_model):
+        authors = [
+            django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            for idx in range(15)
+        ]
+        title = create_rated_titles(authors, 1)[0]
+        review = title.reviews.first()
+        for author in authors:
+            Comment.objects.create(review=review, author=author, text='text')
+
+        for url, model in (
+            (f'/api/v1/titles/{title.id}/reviews/', Review),
+            (f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+             Comment),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(f'{url}?pagination=cursor')
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data and data['next'], (
+                f'Проверьте, что GET-запрос к `{url}?pagination=cursor` '
+                'возвращает курсорную пагинацию со ссылкой `next`.'
+            )
+            assert len(context.captured_queries) == 1
+            sql = context.captured_queries[0]['sql']
+            assert 'OFFSET' not in sql and 'COUNT' not in sql, (
+                f'Проверьте, что курсорная пагинация `{url}` не использует '
+                'OFFSET и COUNT(*).'
+            )
+            ids = [item['id'] for item in data['results']]
+
+            response = client.get(data['next'])
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert data['next'] is None and data['previous']
+            ids += [item['id'] for item in data['results']]
+            expected = list(
+                model.objects.filter(pk__in=ids)
+                .order_by('-pub_date', '-id')
+                .values_list('id', flat=True)
+            )
+            assert ids == expected and len(ids) == 15, (
+                f'Проверьте, что курсорная пагинация `{url}` возвращает все '
+                'объекты без повторов в порядке (-pub_date, -id).'
+            )
+
+            response = client.get(url)
+            assert response.json()['count'] == 15, (
+                f'Проверьте, что без параметра `pagination` эндпоинт '
+                f'`{url}` использует постраничную пагинацию.'
+            )
+
+    def test_06_signup_queries(self, client, django_user_model):
+        url = '/api/v1/auth/signup/'
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        for expected, message in (
+            (2, 'поиск пользователя и создание нового'),
+            (1, 'поиск существующего пользователя'),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(url, data=data)
+            assert response.status_code == HTTPStatus.OK
+            queries = [
+                query['sql'] for query in context.captured_queries
+                if 'reviews_user' in query['sql']
+            ]
+            assert len(queries) == expected, (
+                f'Проверьте, что POST-запрос к `{url}` выполняет '
+                f'{expected} запрос(а) к пользователям: {message}. Сейчас: '
+                f'{queries}.'
+            )
+        assert django_user_model.objects.filter(
+            username='new_user', is_active=False
+        ).count() == 1
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data={
+                'username': 'new_user', 'email': 'other@yamdb.fake'
+            })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'username' in response.json()
+        assert len(context.captured_queries) == 1, (
+            f'Проверьте, что POST-запрос к `{url}` с занятым username '
+            'отклоняется после одного запроса к базе.'
+        )
+
+    def test_07_token_queries(self, client, django_user_model):
+        user = django_user_model.objects.create_user(
+            username='new_user', email='new_user@yamdb.fake', is_active=False
+        )
+        url = '/api/v1/auth/token/'
+        data = {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        }
+        for expected, message in (
+            (['SELECT', 'UPDATE'], 'поиск пользователя и его активация'),
+            (['SELECT'], 'только поиск уже активного пользователя'),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(url, data=data)
+            assert response.status_code == HTTPStatus.OK
+            queries = [
+                query['sql'] for query in context.captured_queries
+                if 'reviews_user' in query['sql']
+            ]
+            assert [sql.split()[0] for sql in queries] == expected, (
+                f'Проверьте, что POST-запрос к `{url}` выполняет '
+                f'{message}. Сейчас: {queries}.'
+            )
+            if 'UPDATE' in expected:
+                assert '"password"' not in queries[-1], (
+                    f'Проверьте, что POST-запрос к `{url}` обновляет только '
+                    'поле is_active.'
+                )
+        user.refresh_from_db()
+        assert user.is_active
+
+    def test_07_concurrent_signup(self, django_user_model):
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        serializer = SendCodeUserSerializer(data=data)
+        assert serializer.is_valid()
+        user = django_user_model.objects.create(**data, is_active=False)
+        assert serializer.save() == user, (
+            'Проверьте, что при параллельной регистрации с теми же '
+            'username и email возвращается созданный ею пользователь.'
+        )
+
+        serializer = SendCodeUserSerializer(data={
+            'username': 'other_user', 'email': 'other@yamdb.fake'
+        })
+        assert serializer.is_valid()
+        django_user_model.objects.create(
+            username='third_user', email='other@yamdb.fake'
+        )
+        with pytest.raises(ValidationError) as error:
+            serializer.save()
+        assert set(error.value.detail) == {'email'}, (
+            'Проверьте, что при параллельной регистрации с тем же email '
+            'ошибка относится к полю `email`.'
+        )
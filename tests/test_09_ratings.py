@@ -0,0 +1,169 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+from tests.utils import (create_rated_titles, create_reviews,
+                         create_single_review)
+
+
+def get_title(title_id):
+    return Title.objects.get(pk=title_id)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09RatingAPI:
+
+    def test_01_rating_follows_reviews(self, admin_client, admin,
+                                       user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        title = get_title(title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            10, 2, 5
+        ), (
+            'Проверьте, что при создании отзыва обновляются поля рейтинга '
+            'произведения.'
+        )
+
+        response = user_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/',
+            data={'score': 9}
+        )
+        assert response.status_code == HTTPStatus.OK
+        title = get_title(title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            14, 2, 7
+        ), (
+            'Проверьте, что при изменении оценки в отзыве обновляется '
+            'рейтинг произведения.'
+        )
+
+        response = admin_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/'
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        title = get_title(title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            9, 1, 9
+        ), (
+            'Проверьте, что при удалении отзыва обновляется рейтинг '
+            'произведения.'
+        )
+
+        response = admin_client.get(f'/api/v1/titles/{title_id}/')
+        assert response.json()['rating'] == 9
+
+        user.delete()
+        title = get_title(title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            0, 0, None
+        ), (
+            'Проверьте, что при удалении автора отзывов обновляется '
+            'рейтинг произведения.'
+        )
+
+    def test_02_recalculate_ratings(self, admin_client, admin, user_client,
+                                    user):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'text', 2)
+        Title.objects.filter(pk=title_id).update(
+            rating_sum=0, rating_count=0, rating=None
+        )
+        Review.objects.filter(author=admin).update(score=8)
+
+        call_command('recalculate_ratings')
+
+        title = get_title(title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            10, 2, 5
+        ), (
+            'Проверьте, что команда `recalculate_ratings` пересчитывает '
+            'рейтинг произведений по отзывам.'
+        )
+        title = get_title(titles[1]['id'])
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            0, 0, None
+        )
+
+    def test_03_score_distribution(self, client, admin_client, admin,
+                                   user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/stats/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        expected = {str(score): 0 for score in range(1, 11)}
+        expected['5'] = 2
+        assert response.json() == {
+            'id': title_id, 'rating': 5, 'reviews_count': 2,
+            'score_distribution': expected,
+        }, (
+            f'Проверьте, что `{url}` возвращает средний рейтинг и число '
+            'отзывов с каждой оценкой.'
+        )
+
+        user_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/',
+            data={'score': 9}
+        )
+        admin_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/'
+        )
+        expected.update({'5': 0, '9': 1})
+        assert client.get(url).json()['score_distribution'] == expected, (
+            'Проверьте, что распределение оценок обновляется при изменении '
+            'и удалении отзывов.'
+        )
+        assert client.get('/api/v1/titles/0/stats/').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+    def test_04_recalculate_score_distribution(self, admin_client, admin):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        title_id = titles[0]['id']
+        Title.objects.filter(pk=title_id).update(score_5=0, score_1=3)
+        Review.objects.update(score=7)
+
+        call_command('recalculate_ratings')
+
+        distribution = get_title(title_id).score_distribution
+        assert distribution == {
+            score: int(score == 7) for score in range(1, 11)
+        }, (
+            'Проверьте, что команда `recalculate_ratings` пересчитывает '
+            'распределение оценок.'
+        )
+
+    def test_05_title_delete_skips_rating(self, django_user_model):
+        users = [
+            django_user_model.objects.create(
+                username=f'user{idx}', email=f'user{idx}@yamdb.fake'
+            )
+            for idx in range(20)
+        ]
+        title = create_rated_titles(users, 1)[0]
+        with CaptureQueriesContext(connection) as context:
+            title.delete()
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(
+                ('UPDATE "reviews_title"', 'UPDATE "reviews_leaderboardentry"')
+            )
+        ]
+        assert not updates, (
+            'Проверьте, что при удалении произведения рейтинг не '
+            'пересчитывается для каждого его отзыва.'
+        )
+        assert not Review.objects.exists()
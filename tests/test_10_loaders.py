@@ -0,0 +1,251 @@
+import csv
+import datetime as dt
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.loaders import (CategoryLoader, CommentLoader, GenreLoader,
+                             ReviewLoader, TitleGenreLoader, TitleLoader,
+                             UserLoader, loading_stages)
+from reviews.models import (Category, Comment, LeaderboardEntry, Review,
+                            Title, User)
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    write_csv(tmp_path / 'category.csv', ('id', 'name', 'slug'),
+              [(1, 'Фильм', 'movie'), (2, 'Книга', 'book')])
+    write_csv(tmp_path / 'users.csv',
+              ('id', 'username', 'email', 'role', 'bio', 'first_name',
+               'last_name'),
+              [(idx, f'user{idx}', f'user{idx}@yamdb.fake', 'user', '', '',
+                '') for idx in range(1, 4)])
+    write_csv(tmp_path / 'titles.csv', ('id', 'name', 'year', 'category'),
+              [(idx, f'Произведение {idx}', 2000, idx % 2 + 1)
+               for idx in range(1, 51)])
+    write_csv(tmp_path / 'review.csv',
+              ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+              [(idx, 1, 'text', idx, idx * 2, '2020-01-01T00:00:00Z')
+               for idx in range(1, 4)])
+    write_csv(tmp_path / 'genre.csv', ('id', 'name', 'slug'),
+              [(1, 'Драма', 'drama')])
+    write_csv(tmp_path / 'genre_title.csv', ('id', 'title_id', 'genre_id'),
+              [(idx, idx, 1) for idx in range(1, 4)])
+    write_csv(tmp_path / 'comments.csv',
+              ('id', 'review_id', 'text', 'author', 'pub_date'),
+              [(1, 1, 'text', 2, '2020-01-01T00:00:00Z')])
+    return tmp_path
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Loaders:
+
+    def test_01_bulk_load(self, data_dir):
+        for command in ('load_category', 'load_users'):
+            call_command(command, path=data_dir)
+
+        with CaptureQueriesContext(connection) as context:
+            call_command('load_title', path=data_dir, batch_size=20)
+        assert Title.objects.count() == 50
+        queries = [query['sql'] for query in context.captured_queries]
+        inserts = [
+            sql for sql in queries
+            if sql.startswith('INSERT INTO "reviews_title"')
+        ]
+        category_checks = [
+            sql for sql in queries if 'FROM "reviews_category"' in sql
+        ]
+        assert len(inserts) == 3 and len(category_checks) <= 3, (
+            'Проверьте, что `load_title` записывает строки пачками и '
+            'проверяет категории одним запросом на пачку.'
+        )
+
+        call_command('load_reviews', path=data_dir)
+        assert Review.objects.count() == 3
+        title = Title.objects.get(pk=1)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            12, 3, 4
+        ), (
+            'Проверьте, что после загрузки отзывов пересчитывается рейтинг '
+            'произведений.'
+        )
+
+        call_command('load_title', path=data_dir)
+        assert Title.objects.count() == 50
+
+    def test_02_missing_foreign_key(self, data_dir):
+        with pytest.raises(CommandError):
+            call_command('load_title', path=data_dir)
+        assert not Category.objects.exists()
+        assert not Title.objects.exists()
+
+    def test_03_loading_stages(self):
+        assert loading_stages() == [
+            [UserLoader, CategoryLoader, GenreLoader],
+            [TitleLoader],
+            [TitleGenreLoader, ReviewLoader],
+            [CommentLoader],
+        ], (
+            'Проверьте, что `load_all` загружает файлы в порядке '
+            'зависимостей и объединяет независимые файлы в один этап.'
+        )
+
+    def test_04_load_all(self, data_dir):
+        call_command('load_all', path=data_dir)
+        assert User.objects.count() == 3
+        assert Title.objects.count() == 50
+        assert Title.genre.through.objects.count() == 3, (
+            'Проверьте, что `genre_title.csv` загружается в жанры '
+            'произведений.'
+        )
+        assert Title.objects.get(pk=1).genre.get().slug == 'drama'
+        assert Review.objects.count() == 3
+        assert Comment.objects.count() == 1
+        assert Title.objects.get(pk=1).rating == 4
+        loaded_date = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+        assert set(Review.objects.values_list('pub_date', flat=True)) == {
+            loaded_date
+        } and Comment.objects.get().pub_date == loaded_date, (
+            'Проверьте, что даты отзывов и комментариев берутся из файла, '
+            'а не из времени загрузки.'
+        )
+        assert Review._meta.get_field('pub_date').auto_now_add
+
+        call_command('load_all', path=data_dir)
+        assert Title.objects.count() == 50
+
+    def test_05_load_all_validates_before_loading(self, data_dir):
+        write_csv(data_dir / 'comments.csv',
+                  ('id', 'review_id', 'text', 'author', 'pub_date'),
+                  [(1, 99, 'text', 2, '2020-01-01T00:00:00Z')])
+        write_csv(data_dir / 'genre.csv', ('id', 'name', 'slug'),
+                  [(1, 'Драма', 'drama'), (2, 'Драма', 'drama-2')])
+        with pytest.raises(CommandError) as error:
+            call_command('load_all', path=data_dir)
+        assert 'review_id' in str(error.value)
+        assert "name='Драма'" in str(error.value)
+        assert not User.objects.exists(), (
+            'Проверьте, что `load_all` проверяет ссылки между файлами до '
+            'начала загрузки.'
+        )
+
+    def test_06_upsert(self, data_dir):
+        call_command('load_all', path=data_dir)
+        write_csv(data_dir / 'category.csv', ('id', 'name', 'slug'),
+                  [(1, 'Фильм', 'movie'), (2, 'Книги', 'book'),
+                   (3, 'Музыка', 'music')])
+        write_csv(data_dir / 'review.csv',
+                  ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+                  [(idx, 1, 'text', idx, 10, '2020-01-01T00:00:00Z')
+                   for idx in range(1, 4)])
+
+        out = StringIO()
+        call_command('load_all', path=data_dir, upsert=True, stdout=out)
+        output = out.getvalue()
+        assert 'category.csv: 3 строк' in output
+        assert 'inserted: 1, updated: 1, unchanged: 1' in output, (
+            'Проверьте, что в режиме `--upsert` команда сообщает число '
+            'добавленных, обновлённых и неизменённых строк.'
+        )
+        assert 'inserted: 0, updated: 0, unchanged: 50' in output
+        assert Category.objects.get(slug='book').name == 'Книги'
+        assert Category.objects.count() == 3
+        assert Title.objects.get(pk=1).rating == 10, (
+            'Проверьте, что после обновления отзывов в режиме `--upsert` '
+            'пересчитывается рейтинг произведений.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            call_command('load_title', path=data_dir, upsert=True,
+                         batch_size=20, stdout=StringIO())
+        assert len(context.captured_queries) <= 10, (
+            'Проверьте, что `--upsert` сравнивает строки пачками, а не '
+            'отдельным запросом на каждую строку.'
+        )
+
+    def test_07_generate_data(self, client, tmp_path):
+        options = {'users': 50, 'titles': 40, 'reviews': 400,
+                   'comments': 100, 'seed': 7, 'stdout': StringIO()}
+        call_command('generate_data', tmp_path / 'first', **options)
+        call_command('generate_data', tmp_path / 'second', load=True,
+                     **options)
+        for filename in ('users.csv', 'titles.csv', 'review.csv',
+                         'comments.csv', 'genre_title.csv'):
+            first = (tmp_path / 'first' / filename).read_text('utf-8')
+            second = (tmp_path / 'second' / filename).read_text('utf-8')
+            assert first == second, (
+                'Проверьте, что `generate_data` с одинаковым `--seed` '
+                'создаёт одинаковые данные.'
+            )
+
+        assert User.objects.count() == 50
+        assert Review.objects.count() == 400
+        assert Title.genre.through.objects.exists()
+        assert Review.objects.values('pub_date').distinct().count() == 400
+        assert LeaderboardEntry.objects.filter(genre__isnull=False).exists()
+        response = client.get('/api/v1/titles/?genre=genre-1')
+        assert response.json()['count'] > 0, (
+            'Проверьте, что после `generate_data --load` произведения '
+            'фильтруются по жанрам.'
+        )
+        assert Comment.objects.count() == 100
+        counts = sorted(
+            Title.objects.values_list('rating_count', flat=True),
+            reverse=True
+        )
+        assert counts[0] == 50 and counts[0] > 5 * counts[len(counts) // 2], (
+            'Проверьте, что `generate_data` создаёт перекос: у нескольких '
+            'произведений отзывов намного больше, чем у остальных.'
+        )
+
+    def test_08_blank_and_invalid_foreign_keys(self, data_dir):
+        call_command('load_category', path=data_dir)
+        write_csv(data_dir / 'titles.csv', ('id', 'name', 'year', 'category'),
+                  [(1, 'Без категории', 2000, ''), (2, 'Фильм', 2000, 1),
+                   (3, 'Книга', 2000, 2)])
+        call_command('load_title', path=data_dir)
+        assert Title.objects.get(pk=1).category_id is None, (
+            'Проверьте, что пустая необязательная ссылка загружается '
+            'как NULL.'
+        )
+        call_command('load_all', path=data_dir, upsert=True)
+
+        write_csv(data_dir / 'titles.csv', ('id', 'name', 'year', 'category'),
+                  [(4, 'Фильм', 2000, 'films')])
+        with pytest.raises(CommandError) as error:
+            call_command('load_title', path=data_dir, upsert=True)
+        assert 'category' in str(error.value), (
+            'Проверьте, что нечисловой id в ссылке даёт ошибку команды, '
+            'а не ValueError.'
+        )
+        with pytest.raises(CommandError):
+            call_command('load_all', path=data_dir, upsert=True)
+
+    def test_09_failed_load_rolls_back(self, data_dir):
+        call_command('load_category', path=data_dir)
+        rows = [(idx, f'Произведение {idx}', 2000, 1) for idx in range(1, 51)]
+        rows[-1] = (50, 'Произведение 50', 2000, 99)
+        write_csv(data_dir / 'titles.csv', ('id', 'name', 'year', 'category'),
+                  rows)
+        with pytest.raises(CommandError):
+            call_command('load_title', path=data_dir, batch_size=20)
+        assert not Title.objects.exists(), (
+            'Проверьте, что при ошибке в одной из пачек `load_title` не '
+            'оставляет в базе уже записанные пачки.'
+        )
+
+        rows[-1] = (50, 'Произведение 50', 2000, 1)
+        write_csv(data_dir / 'titles.csv', ('id', 'name', 'year', 'category'),
+                  rows)
+        call_command('load_title', path=data_dir, batch_size=20)
+        assert Title.objects.count() == 50
@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.test import override_settings
+
+from api_yamdb.metrics import registry
+from tests.utils import create_rated_titles
+
+
+def metric_value(text, sample):
+    for line in text.splitlines():
+        if line.startswith(sample + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+@pytest.fixture
+def metrics_enabled(settings):
+    settings.METRICS_ENABLED = True
+    return settings
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11Monitoring:
+
+    def test_01_timing_disabled_by_default(self, client):
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert not response.has_header('Server-Timing')
+
+    @override_settings(REQUEST_TIMING_ENABLED=True, DEBUG=False)
+    def test_02_server_timing(self, client, admin, caplog):
+        create_rated_titles([admin], 3)
+        url = '/api/v1/titles/'
+        with caplog.at_level(logging.INFO, logger='api_yamdb.requests'):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        header = response.get('Server-Timing', '')
+        assert 'desc="3 queries"' in header, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `Server-Timing` с числом SQL-запросов.'
+        )
+        for metric in ('db;dur=', 'serializer;dur=', 'view;dur='):
+            assert metric in header
+
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['route'] == 'titles-list'
+        assert record['method'] == 'GET'
+        assert record['status'] == HTTPStatus.OK
+        assert record['queries'] == 3
+        assert record['serializer_ms'] > 0
+        assert record['view_ms'] >= record['db_ms']
+
+    def test_03_metrics_endpoint(self, client, metrics_enabled):
+        url = '/metrics'
+        requests = (
+            'yamdb_http_requests_total'
+            '{route="titles-list",method="GET",status="200"}'
+        )
+        queries = (
+            'yamdb_http_request_db_queries_bucket'
+            '{route="titles-list",method="GET",le="+Inf"}'
+        )
+        before = client.get(url).content.decode()
+        for _ in range(3):
+            client.get('/api/v1/titles/')
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert (
+            metric_value(text, requests) - metric_value(before, requests) == 3
+        ), (
+            f'Проверьте, что `{url}` считает запросы по маршруту и методу.'
+        )
+        assert metric_value(text, queries) - metric_value(before, queries) == 3
+        assert '# TYPE yamdb_http_request_duration_seconds histogram' in text
+
+    def test_04_auth_outcomes(self, client, user, metrics_enabled):
+        url = '/metrics'
+        issued = 'yamdb_auth_token_total{outcome="issued"}'
+        bad_code = 'yamdb_auth_token_total{outcome="bad_code"}'
+        before = client.get(url).content.decode()
+        client.post('/api/v1/auth/token/', {
+            'username': user.username, 'confirmation_code': 'wrong',
+        })
+        client.post('/api/v1/auth/token/', {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        text = client.get(url).content.decode()
+        assert metric_value(text, issued) - metric_value(before, issued) == 1
+        assert (
+            metric_value(text, bad_code) - metric_value(before, bad_code) == 1
+        )
+
+    def test_05_multiprocess_merge(self, client, tmp_path, metrics_enabled):
+        sample = 'yamdb_auth_token_total{outcome="unknown_user"}'
+        own = metric_value(registry.render(), sample)
+        # Снимок завершённого процесса с тем же pid не должен затираться.
+        for name in ('metrics_1.json', f'metrics_{os.getpid()}.json'):
+            (tmp_path / name).write_text(json.dumps({
+                'yamdb_auth_token_total': {'["unknown_user"]': 5},
+            }))
+        with override_settings(METRICS_MULTIPROCESS_DIR=str(tmp_path)):
+            text = client.get('/metrics').content.decode()
+        assert metric_value(text, sample) == own + 10, (
+            'Проверьте, что `/metrics` суммирует значения всех процессов, '
+            'включая завершённые.'
+        )
+
+    def test_06_metrics_access(self, client, settings):
+        url = '/metrics'
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что `{url}` по умолчанию выключен.'
+        )
+        settings.METRICS_ENABLED = True
+        assert client.get(url).status_code == HTTPStatus.OK
+        assert client.get(
+            url, REMOTE_ADDR='10.0.0.1'
+        ).status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что без токена `{url}` доступен только с адресов '
+            'METRICS_ALLOWED_IPS.'
+        )
+        settings.METRICS_TOKEN = 'secret'
+        assert client.get(url).status_code == HTTPStatus.FORBIDDEN
+        assert client.get(
+            url, HTTP_AUTHORIZATION='Bearer secret', REMOTE_ADDR='10.0.0.1'
+        ).status_code == HTTPStatus.OK, (
+            f'Проверьте, что с заданным METRICS_TOKEN `{url}` доступен по '
+            'заголовку Authorization.'
+        )
@@ -0,0 +1,100 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Review, Title
+from tests.utils import create_rated_titles
+
+
+def get_twice(client, url):
+    """Два одинаковых GET-запроса; возвращает второй ответ и его запросы."""
+    first = client.get(url)
+    assert first.status_code == HTTPStatus.OK
+    with CaptureQueriesContext(connection) as context:
+        second = client.get(url)
+    assert second.status_code == HTTPStatus.OK
+    return second, context.captured_queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12Cache:
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/categories/',
+        '/api/v1/categories/?search=Фильм',
+        '/api/v1/genres/',
+        '/api/v1/titles/',
+        '/api/v1/titles/?year=2000&page=1',
+    ))
+    def test_01_repeated_get_is_cached(self, client, admin, url):
+        create_rated_titles([admin], 3)
+        first = client.get(url).json()
+        response, queries = get_twice(client, url)
+        assert not queries, (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдаётся из '
+            'кеша без запросов к базе данных.'
+        )
+        assert response.json() == first
+
+    def test_02_query_string_is_part_of_key(self, client, admin):
+        create_rated_titles([admin], 3)
+        client.get('/api/v1/titles/?year=2000')
+        response = client.get('/api/v1/titles/?year=1999')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что ответы с разными параметрами запроса '
+            'кешируются отдельно.'
+        )
+
+    def test_03_invalidation(self, client, admin):
+        titles = create_rated_titles([admin], 2)
+        title = titles[0]
+        detail = f'/api/v1/titles/{title.id}/'
+        client.get(detail)
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/genres/')
+
+        Category.objects.filter(slug='films').get().delete()
+        assert client.get(detail).json()['category'] is None, (
+            'Проверьте, что изменение категории сбрасывает кеш '
+            'произведений.'
+        )
+        assert client.get('/api/v1/categories/').json()['count'] == 0
+
+        genre = Genre.objects.create(name='Комедия', slug='comedy')
+        assert client.get('/api/v1/genres/').json()['count'] == 2
+        title.genre.add(genre)
+        genres = [item['slug'] for item in client.get(detail).json()['genre']]
+        assert 'comedy' in genres, (
+            'Проверьте, что изменение жанров произведения сбрасывает кеш.'
+        )
+
+        Title.objects.filter(pk=title.pk).get().save()
+        review = Review.objects.get(title=title)
+        review.score = 5
+        review.save()
+        assert client.get(detail).json()['rating'] == 5, (
+            'Проверьте, что изменение отзыва сбрасывает кеш рейтинга.'
+        )
+
+    def test_04_bulk_changes_invalidate(self, client, admin):
+        titles = create_rated_titles([admin], 1)
+        detail = f'/api/v1/titles/{titles[0].id}/'
+        client.get(detail)
+        Review.objects.update(score=7)
+        call_command('recalculate_ratings', stdout=StringIO())
+        assert client.get(detail).json()['rating'] == 7, (
+            'Проверьте, что команда recalculate_ratings сбрасывает кеш.'
+        )
+
+    def test_05_writes_are_not_cached(self, admin_client):
+        url = '/api/v1/categories/'
+        data = {'name': 'Книги', 'slug': 'books'}
+        response = admin_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        assert admin_client.get(url).json()['count'] == 1
+        response = admin_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,136 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, User
+from tests.utils import create_rated_titles
+
+
+def assert_not_modified(client, url, **headers):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **headers)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        f'Проверьте, что GET-запрос к `{url}` с заголовками {headers} '
+        'возвращает ответ со статусом 304.'
+    )
+    assert not response.content
+    assert not context.captured_queries, (
+        f'Проверьте, что ответ 304 на запрос к `{url}` не обращается к '
+        'базе данных.'
+    )
+    return response
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Conditional:
+
+    def test_01_etag(self, client, admin):
+        titles = create_rated_titles([admin], 2)
+        title = titles[0]
+        review = Review.objects.get(title=title)
+        comment = Comment.objects.create(review=review, author=admin,
+                                         text='text')
+        reviews = f'/api/v1/titles/{title.id}/reviews/'
+        comments = f'{reviews}{review.id}/comments/'
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{title.id}/',
+                    reviews, f'{reviews}{review.id}/', comments,
+                    f'{comments}{comment.id}/'):
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.has_header('ETag'), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовок `ETag`.'
+            )
+            not_modified = assert_not_modified(
+                client, url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+            assert not_modified['ETag'] == response['ETag']
+            assert not response.has_header('Last-Modified'), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` не содержит '
+                'Last-Modified: секундной точности недостаточно.'
+            )
+
+    def test_02_etag_changes_with_data(self, client, user_client, user,
+                                       admin):
+        titles = create_rated_titles([admin], 2)
+        first = f'/api/v1/titles/{titles[0].id}/reviews/'
+        second = f'/api/v1/titles/{titles[1].id}/reviews/'
+        first_etag = user_client.get(first)['ETag']
+        second_etag = user_client.get(second)['ETag']
+        title_etag = user_client.get(
+            f'/api/v1/titles/{titles[0].id}/'
+        )['ETag']
+
+        response = user_client.post(first, data={'text': 'text', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.get(first, HTTP_IF_NONE_MATCH=first_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый отзыв меняет ETag списка отзывов.'
+        )
+        assert len(response.json()['results']) == 2
+        assert_not_modified(client, second, HTTP_IF_NONE_MATCH=second_etag)
+
+        review = Review.objects.get(title=titles[0], author=user)
+        comments = f'{first}{review.id}/comments/'
+        comments_etag = user_client.get(comments)['ETag']
+        response = user_client.post(comments, data={'text': 'text'})
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.get(comments, HTTP_IF_NONE_MATCH=comments_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет ETag списка '
+            'комментариев.'
+        )
+        assert user_client.get(
+            f'/api/v1/titles/{titles[0].id}/', HTTP_IF_NONE_MATCH=title_etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что новый отзыв меняет ETag произведения.'
+        )
+
+    def test_03_author_rename_changes_etag(self, client, admin):
+        titles = create_rated_titles([admin], 1)
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        etag = client.get(url)['ETag']
+        admin.username = 'RenamedAdmin'
+        admin.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'][0]['author'] == 'RenamedAdmin'
+
+    def test_04_title_rename_changes_etag(self, client, admin):
+        titles = create_rated_titles([admin], 2)
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        other = f'/api/v1/titles/{titles[1].id}/reviews/'
+        etag = client.get(url)['ETag']
+        other_etag = client.get(other)['ETag']
+        titles[0].name = 'Новое название'
+        titles[0].save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что переименование произведения меняет ETag списка '
+            'его отзывов.'
+        )
+        assert response.json()['results'][0]['title'] == 'Новое название'
+        assert_not_modified(client, other, HTTP_IF_NONE_MATCH=other_etag)
+
+    def test_05_profile_save_keeps_etag(self, client, admin):
+        titles = create_rated_titles([admin], 1)
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        etag = client.get(url)['ETag']
+        loaded = User.objects.get(pk=admin.pk)
+        loaded.bio = 'new bio'
+        loaded.save()
+        assert_not_modified(client, url, HTTP_IF_NONE_MATCH=etag)
+        loaded.username = 'RenamedAdmin'
+        loaded.save()
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что смена имени загруженного пользователя меняет '
+            'ETag отзывов.'
+        )
+        etag = client.get(url)['ETag']
+        loaded.bio = 'other bio'
+        loaded.save()
+        assert_not_modified(client, url, HTTP_IF_NONE_MATCH=etag)
@@ -0,0 +1,104 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+
+def search(client, query):
+    response = client.get('/api/v1/titles/', {'search': query})
+    assert response.status_code == HTTPStatus.OK, (
+        'Проверьте, что GET-запрос к `/api/v1/titles/` с параметром '
+        '`search` возвращает ответ со статусом 200.'
+    )
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.fixture
+def catalogue():
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    fantasy = Genre.objects.create(name='Фэнтези', slug='fantasy')
+    titles = {
+        'rings': Title.objects.create(
+            name='Властелин колец', year=2001, category=films,
+            description='Экранизация романа о хоббитах.',
+        ),
+        'hobbit': Title.objects.create(
+            name='Хоббит', year=1937, category=books,
+            description='Сказочная повесть.',
+        ),
+        'godfather': Title.objects.create(
+            name='Крёстный отец', year=1972, category=films,
+            description='Семейная сага.',
+        ),
+    }
+    titles['rings'].genre.add(fantasy)
+    titles['hobbit'].genre.add(fantasy)
+    titles['godfather'].genre.add(drama)
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Search:
+
+    def test_01_search_fields(self, client, catalogue):
+        assert search(client, 'колец') == ['Властелин колец']
+        assert search(client, 'власт') == ['Властелин колец'], (
+            'Проверьте, что поиск находит произведения по началу слова.'
+        )
+        assert search(client, 'сага') == ['Крёстный отец'], (
+            'Проверьте, что поиск учитывает описание произведения.'
+        )
+        assert sorted(search(client, 'фэнтези')) == [
+            'Властелин колец', 'Хоббит'
+        ], 'Проверьте, что поиск учитывает жанры произведения.'
+        assert search(client, 'книга') == ['Хоббит'], (
+            'Проверьте, что поиск учитывает категорию произведения.'
+        )
+        assert search(client, 'фильм семейная') == ['Крёстный отец']
+        assert search(client, 'мюзикл') == []
+
+    def test_02_ranking(self, client, catalogue):
+        assert search(client, 'хоббит') == ['Хоббит', 'Властелин колец'], (
+            'Проверьте, что совпадение в названии ранжируется выше '
+            'совпадения в описании.'
+        )
+
+    def test_03_query_syntax_is_escaped(self, client, catalogue):
+        assert search(client, '"колец* -(') == ['Властелин колец']
+        assert search(client, '***') == []
+
+    def test_04_index_follows_changes(self, client, catalogue):
+        title = catalogue['godfather']
+        title.name = 'Однажды в Америке'
+        title.save()
+        assert search(client, 'отец') == []
+        assert search(client, 'америке') == ['Однажды в Америке'], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+
+        drama = Genre.objects.get(slug='drama')
+        drama.name = 'Криминал'
+        drama.save()
+        assert search(client, 'криминал') == ['Однажды в Америке']
+        title.genre.remove(drama)
+        assert search(client, 'криминал') == []
+
+        Category.objects.get(slug='books').delete()
+        assert search(client, 'книга') == []
+        catalogue['hobbit'].delete()
+        assert search(client, 'фэнтези') == ['Властелин колец']
+
+    def test_05_api_writes_are_indexed(self, admin_client, catalogue):
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Сияние', 'year': 1980, 'category': 'films',
+            'genre': ['drama'], 'description': 'Отель в горах.',
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        assert search(admin_client, 'отель') == ['Сияние']
+        assert sorted(search(admin_client, 'драма')) == [
+            'Крёстный отец', 'Сияние'
+        ]
@@ -0,0 +1,140 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.leaderboards import rebuild_leaderboards
+from reviews.models import Category, Genre, LeaderboardEntry, Review, Title
+
+
+def names(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом '
+        '200.'
+    )
+    return [title['name'] for title in response.json()]
+
+
+def entries_state():
+    return sorted(LeaderboardEntry.objects.values_list(
+        'title_id', 'genre_id', 'category_id', 'rating_count',
+        'weighted_rating',
+    ), key=lambda entry: (entry[0], entry[1] or 0))
+
+
+@pytest.fixture
+def reviewers(django_user_model):
+    return [
+        django_user_model.objects.create_user(
+            username=f'reviewer{idx}', email=f'reviewer{idx}@yamdb.fake'
+        )
+        for idx in range(6)
+    ]
+
+
+@pytest.fixture
+def catalogue(reviewers):
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    titles = {}
+    for name, category, genres, scores in (
+        ('Один отзыв', films, [drama], [10]),
+        ('Стабильно хорошо', films, [drama, comedy], [9, 9, 9, 9, 9]),
+        ('Средне', books, [comedy], [5, 6, 5]),
+        ('Без отзывов', books, [], []),
+    ):
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.set(genres)
+        for author, score in zip(reviewers, scores):
+            Review.objects.create(title=title, author=author, text='text',
+                                  score=score)
+        titles[name] = title
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Leaderboards:
+
+    def test_01_top_rated(self, client, catalogue):
+        url = '/api/v1/titles/top/'
+        assert names(client, url) == [
+            'Стабильно хорошо', 'Один отзыв', 'Без отзывов', 'Средне'
+        ], (
+            f'Проверьте, что `{url}` сортирует произведения по байесовскому '
+            'рейтингу: много высоких оценок выше одной максимальной.'
+        )
+        top = client.get(url).json()[0]
+        assert top['reviews_count'] == 5
+        assert top['rating'] == 9
+        assert 5.5 < top['weighted_rating'] < 9
+
+        assert names(client, f'{url}?min_reviews=1&limit=2') == [
+            'Стабильно хорошо', 'Один отзыв'
+        ]
+        assert names(client, f'{url}?category=books') == [
+            'Без отзывов', 'Средне'
+        ]
+        assert names(client, f'{url}?genre=comedy') == [
+            'Стабильно хорошо', 'Средне'
+        ]
+        assert names(client, f'{url}?genre=comedy&category=films') == [
+            'Стабильно хорошо'
+        ]
+        for params in ('limit=0', 'limit=101', 'min_reviews=-1',
+                       'genre=bad slug'):
+            response = client.get(f'{url}?{params}')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_most_reviewed(self, client, catalogue):
+        url = '/api/v1/titles/most-reviewed/'
+        assert names(client, url) == [
+            'Стабильно хорошо', 'Средне', 'Один отзыв', 'Без отзывов'
+        ], f'Проверьте, что `{url}` сортирует произведения по числу отзывов.'
+        assert names(client, f'{url}?genre=drama') == [
+            'Стабильно хорошо', 'Один отзыв'
+        ]
+
+    def test_03_constant_queries(self, client, catalogue):
+        url = '/api/v1/titles/top/?genre=drama'
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        assert len(context.captured_queries) <= 2, (
+            f'Проверьте, что `{url}` читает топ одним запросом к строкам '
+            'топа и одним запросом к жанрам.'
+        )
+
+    def test_04_incremental_refresh(self, client, catalogue, reviewers):
+        url = '/api/v1/titles/top/'
+        title = catalogue['Средне']
+        for review in Review.objects.filter(title=title):
+            review.score = 10
+            review.save()
+        for author in reviewers[3:]:
+            Review.objects.create(title=title, author=author, text='text',
+                                  score=10)
+        assert names(client, url)[0] == 'Средне', (
+            'Проверьте, что топ обновляется при добавлении отзывов.'
+        )
+        title.genre.add(Genre.objects.get(slug='drama'))
+        assert 'Средне' in names(client, f'{url}?genre=drama')
+        title.genre.clear()
+        assert 'Средне' not in names(client, f'{url}?genre=comedy')
+        title.refresh_from_db()
+        title.category = Category.objects.get(slug='films')
+        title.save()
+        assert names(client, f'{url}?category=films')[0] == 'Средне'
+        Review.objects.filter(title=title).delete()
+        catalogue['Один отзыв'].delete()
+        Genre.objects.get(slug='comedy').delete()
+        Category.objects.get(slug='books').delete()
+
+        incremental = entries_state()
+        rebuild_leaderboards()
+        assert entries_state() == incremental, (
+            'Проверьте, что инкрементальные изменения топов совпадают с '
+            'полным пересчётом.'
+        )
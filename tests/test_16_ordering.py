@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+
+from api.filters import TitleOrderingFilter
+from reviews.models import Review, Title
+
+
+def names(client, query):
+    url = f'/api/v1/titles/?{query}'
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом '
+        '200.'
+    )
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.fixture
+def titles(django_user_model):
+    users = [
+        django_user_model.objects.create_user(
+            username=f'critic{idx}', email=f'critic{idx}@yamdb.fake'
+        )
+        for idx in range(3)
+    ]
+    titles = {}
+    for name, year, scores in (
+        ('Б', 2001, [8, 8]),
+        ('А', 1999, [8]),
+        ('В', 2001, []),
+        ('Г', 1980, [3, 5, 7]),
+    ):
+        titles[name] = Title.objects.create(name=name, year=year)
+        for author, score in zip(users, scores):
+            Review.objects.create(title=titles[name], author=author,
+                                  text='text', score=score)
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Ordering:
+
+    def test_01_ordering_fields(self, client, titles):
+        assert names(client, 'ordering=-rating') == ['А', 'Б', 'Г', 'В'], (
+            'Проверьте, что `?ordering=-rating` сортирует произведения по '
+            'убыванию рейтинга, при равенстве — по убыванию id, а '
+            'произведения без рейтинга идут последними.'
+        )
+        assert names(client, 'ordering=rating') == ['Г', 'Б', 'А', 'В']
+        assert names(client, 'ordering=-reviews_count') == [
+            'Г', 'Б', 'А', 'В'
+        ]
+        assert names(client, 'ordering=year,-reviews_count') == [
+            'Г', 'А', 'Б', 'В'
+        ]
+        assert names(client, 'ordering=-year,name') == ['Б', 'В', 'А', 'Г']
+        assert names(client, 'ordering=name') == ['А', 'Б', 'В', 'Г']
+
+    def test_02_default_and_invalid_ordering(self, client, titles):
+        by_id = ['Б', 'А', 'В', 'Г']
+        assert names(client, '') == by_id, (
+            'Проверьте, что по умолчанию произведения отсортированы по id.'
+        )
+        assert names(client, 'ordering=description') == by_id
+
+    def test_03_search_keeps_relevance(self, client, titles):
+        titles['Г'].description = 'Б'
+        titles['Г'].save()
+        assert names(client, 'search=б') == ['Б', 'Г'], (
+            'Проверьте, что без `ordering` поиск сортирует по релевантности.'
+        )
+        assert names(client, 'search=б&ordering=year') == ['Г', 'Б']
+
+    @pytest.mark.parametrize('ordering,index', (
+        ('-rating', 'title_rating_idx'),
+        ('-reviews_count', 'title_rating_count_idx'),
+        ('year', 'title_year_idx'),
+    ))
+    def test_04_ordering_uses_index(self, titles, ordering, index):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Планы запросов проверяются для SQLite.')
+        queryset = Title.objects.order_by(
+            *TitleOrderingFilter().translate([ordering])
+        )[:10]
+        assert index in queryset.explain(), (
+            f'Проверьте, что сортировка `{ordering}` использует индекс '
+            f'`{index}`.'
+        )
@@ -0,0 +1,111 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_rated_titles
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом '
+        '200.'
+    )
+    return response.json(), context.captured_queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Fieldsets:
+
+    def test_01_title_fields(self, client, admin, moderator):
+        create_rated_titles([admin, moderator], 3)
+        _, full_queries = get_with_queries(client, '/api/v1/titles/')
+
+        url = '/api/v1/titles/?fields=id,name'
+        data, queries = get_with_queries(client, url)
+        assert all(
+            set(title) == {'id', 'name'} for title in data['results']
+        ), (
+            f'Проверьте, что GET-запрос к `{url}` возвращает только '
+            'перечисленные в `fields` поля.'
+        )
+        assert len(queries) == len(full_queries) - 1, (
+            f'Проверьте, что GET-запрос к `{url}` не загружает жанры '
+            'отдельным запросом, если их нет в ответе.'
+        )
+        sql = queries[-1]['sql']
+        assert 'reviews_category' not in sql and 'description' not in sql, (
+            f'Проверьте, что GET-запрос к `{url}` выбирает из базы только '
+            'нужные колонки и не присоединяет категорию.'
+        )
+
+        url = '/api/v1/titles/?exclude=description,genre'
+        data, _ = get_with_queries(client, url)
+        assert set(data['results'][0]) == {
+            'id', 'name', 'year', 'rating', 'category'
+        }, (
+            f'Проверьте, что GET-запрос к `{url}` не возвращает '
+            'перечисленные в `exclude` поля.'
+        )
+        assert data['results'][0]['category'] == {
+            'name': 'Фильм', 'slug': 'films'
+        }, 'Проверьте, что вложенные объекты возвращаются целиком.'
+
+        title_id = data['results'][0]['id']
+        url = f'/api/v1/titles/{title_id}/?fields=rating'
+        data, _ = get_with_queries(client, url)
+        assert data == {'rating': 1}
+
+        url = f'/api/v1/titles/{title_id}/?fields=id,category,genre'
+        data, _ = get_with_queries(client, url)
+        assert data == {
+            'id': title_id,
+            'category': {'name': 'Фильм', 'slug': 'films'},
+            'genre': [{'name': 'Драма', 'slug': 'drama'}],
+        }, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает вложенные '
+            'объекты целиком.'
+        )
+
+        url = '/api/v1/titles/?fields=id,unknown'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что GET-запрос к `{url}` с неизвестным полем '
+            'возвращает ответ со статусом 400.'
+        )
+
+    def test_02_review_fields_with_cursor(self, client, admin, moderator,
+                                          user):
+        title = create_rated_titles([admin, moderator, user], 1)[0]
+        url = (
+            f'/api/v1/titles/{title.id}/reviews/'
+            '?fields=id,score&pagination=cursor'
+        )
+        data, queries = get_with_queries(client, url)
+        assert [set(review) for review in data['results']] == [
+            {'id', 'score'}
+        ] * 3
+        assert len(queries) == 1, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет один запрос: '
+            'поля для курсора загружаются вместе со страницей.'
+        )
+        assert 'reviews_user' not in queries[0]['sql'], (
+            f'Проверьте, что GET-запрос к `{url}` не присоединяет авторов, '
+            'если их нет в ответе.'
+        )
+
+    def test_03_fields_ignored_on_write(self, admin_client):
+        url = '/api/v1/categories/?fields=slug'
+        response = admin_client.post(
+            url, data={'name': 'Фильм', 'slug': 'films'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json() == {'name': 'Фильм', 'slug': 'films'}, (
+            'Проверьте, что `fields` не влияет на запросы на запись.'
+        )
+        assert admin_client.get(url).json()['results'] == [
+            {'slug': 'films'}
+        ]
@@ -0,0 +1,233 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import RoleAccessToken
+from reviews.loaders import UserLoader
+from reviews.models import Title, User
+from tests.test_10_loaders import write_csv
+
+
+def user_lookups(queries):
+    return [
+        query for query in queries
+        if 'WHERE "reviews_user"."id" =' in query['sql']
+    ]
+
+
+@pytest.fixture
+def token_claims(settings):
+    settings.AUTH_TOKEN_CLAIMS = True
+    return settings
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18Authentication:
+
+    def test_01_user_cached(self, user_client, user):
+        url = '/api/v1/users/me/'
+        assert user_client.get(url).status_code == HTTPStatus.OK
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == user.username
+        assert not context.captured_queries, (
+            f'Проверьте, что повторный GET-запрос к `{url}` берёт '
+            'пользователя из кеша аутентификации и не обращается к базе.'
+        )
+
+        response = user_client.patch(url, data={'bio': 'new bio'})
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(url).json()['bio'] == 'new bio', (
+            f'Проверьте, что после PATCH-запроса к `{url}` пользователь в '
+            'кеше аутентификации обновляется.'
+        )
+
+    def test_02_role_change_invalidates(self, user_client, user):
+        url = '/api/v1/users/'
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN
+
+        user.role = 'admin'
+        user.save()
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что смена роли пользователя действует со '
+            'следующего запроса.'
+        )
+        assert len(user_lookups(context.captured_queries)) == 1, (
+            'Проверьте, что после смены роли пользователь заново '
+            'загружается из базы.'
+        )
+
+        user.is_active = False
+        user.save()
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что заблокированный пользователь теряет доступ со '
+            'следующего запроса.'
+        )
+
+        user.delete()
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_03_role_claims(self, client, admin, token_claims):
+        code = default_token_generator.make_token(admin)
+        response = client.post('/api/v1/auth/token/', data={
+            'username': admin.username, 'confirmation_code': code
+        })
+        assert response.status_code == HTTPStatus.OK
+        token = AccessToken(response.json()['token'])
+        assert token['role'] == 'admin' and token['is_superuser'] is False, (
+            'Проверьте, что токен содержит роль пользователя и признак '
+            'суперпользователя.'
+        )
+
+        admin_client = APIClient()
+        admin_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+        url = '/api/v1/categories/'
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                url, data={'name': 'Фильм', 'slug': 'films'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not user_lookups(context.captured_queries), (
+            f'Проверьте, что права на POST-запрос к `{url}` проверяются по '
+            'роли из токена, без загрузки пользователя.'
+        )
+
+        admin.bio = 'new bio'
+        admin.save()
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                url, data={'name': 'Книга', 'slug': 'books'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not user_lookups(context.captured_queries), (
+            'Проверьте, что изменение профиля не отзывает роль из токена.'
+        )
+
+        admin.role = 'user'
+        admin.save()
+        response = admin_client.post(
+            url, data={'name': 'Музыка', 'slug': 'music'}
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что понижение роли действует сразу, несмотря на '
+            'роль в ранее выданном токене.'
+        )
+
+    def test_04_token_user_author(self, admin, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        token = RoleAccessToken.for_user(user)
+        user_client = APIClient()
+        user_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, data={'text': 'text', 'score': 7})
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username, (
+            'Проверьте, что отзыв, созданный с токеном с ролью, '
+            'принадлежит пользователю токена.'
+        )
+        review_url = f'{url}{response.json()["id"]}/'
+        response = user_client.patch(review_url, data={'score': 8})
+        assert response.status_code == HTTPStatus.OK
+
+        other_client = APIClient()
+        other_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(admin)}'
+        )
+        admin.role = 'user'
+        admin.save()
+        response = other_client.patch(review_url, data={'score': 1})
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что чужой отзыв может изменить только автор, '
+            'модератор или администратор.'
+        )
+
+    def test_05_loaded_user_role_changes(self, admin, token_claims):
+        token = RoleAccessToken.for_user(admin)
+        admin_client = APIClient()
+        admin_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = '/api/v1/users/'
+        loaded = User.objects.get(pk=admin.pk)
+
+        loaded.bio = 'new bio'
+        loaded.save()
+        with CaptureQueriesContext(connection) as context:
+            assert admin_client.get(url).status_code == HTTPStatus.OK
+        assert not user_lookups(context.captured_queries)
+
+        for role, expected in (('user', HTTPStatus.FORBIDDEN),
+                               ('admin', HTTPStatus.OK),
+                               ('user', HTTPStatus.FORBIDDEN)):
+            loaded.role = role
+            loaded.save()
+            assert admin_client.get(url).status_code == expected, (
+                'Проверьте, что каждое изменение роли загруженного '
+                'пользователя сразу меняет его права.'
+            )
+
+    def test_06_claims_disabled(self, admin):
+        admin_client = APIClient()
+        admin_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(admin)}'
+        )
+        with CaptureQueriesContext(connection) as context:
+            assert admin_client.get('/api/v1/users/').status_code == (
+                HTTPStatus.OK
+            )
+        assert len(user_lookups(context.captured_queries)) == 1, (
+            'Проверьте, что без AUTH_TOKEN_CLAIMS права проверяются по '
+            'пользователю, а не по роли из токена.'
+        )
+
+    def test_07_claims_max_age(self, admin, token_claims):
+        token = RoleAccessToken.for_user(admin)
+        token['iat'] = int(time.time()) - 3600
+        admin_client = APIClient()
+        admin_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = '/api/v1/users/'
+        with CaptureQueriesContext(connection) as context:
+            assert admin_client.get(url).status_code == HTTPStatus.OK
+        assert not user_lookups(context.captured_queries), (
+            'Проверьте, что роль из токена используется весь срок его '
+            'жизни, пока не изменилась версия прав.'
+        )
+
+        token_claims.AUTH_TOKEN_CLAIMS_MAX_AGE = 60
+        with CaptureQueriesContext(connection) as context:
+            assert admin_client.get(url).status_code == HTTPStatus.OK
+        assert len(user_lookups(context.captured_queries)) == 1, (
+            'Проверьте, что роль из токена старше '
+            'AUTH_TOKEN_CLAIMS_MAX_AGE секунд не используется.'
+        )
+
+    def test_08_upsert_revokes_claims(self, admin, tmp_path, token_claims):
+        admin_client = APIClient()
+        admin_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(admin)}'
+        )
+        url = '/api/v1/users/'
+        assert admin_client.get(url).status_code == HTTPStatus.OK
+        write_csv(
+            tmp_path / 'users.csv',
+            ('id', 'username', 'email', 'role', 'bio', 'first_name',
+             'last_name'),
+            [(admin.pk, admin.username, admin.email, 'user', '', '', '')],
+        )
+        assert UserLoader(tmp_path).upsert()['updated'] == 1
+        assert admin_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что понижение роли при загрузке `users.csv` с '
+            '`--upsert` отзывает права из ранее выданных токенов.'
+        )
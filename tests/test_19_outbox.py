@@ -0,0 +1,160 @@
+import datetime as dt
+import smtplib
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+from reviews.outbox import (enqueue_email, pending_emails, purge_sent,
+                            send_pending)
+
+
+class FlakyBackend(EmailBackend):
+    """Почтовый бэкенд, который не принимает адреса с fail."""
+
+    opened = 0
+    in_transaction = None
+    pending = None
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        FlakyBackend.in_transaction = connection.in_atomic_block
+        FlakyBackend.pending = pending_emails().count()
+        for message in messages:
+            if any('fail' in address for address in message.to):
+                raise smtplib.SMTPRecipientsRefused(message.to)
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def outbox_settings(settings):
+    settings.EMAIL_OUTBOX_ENABLED = True
+    settings.EMAIL_OUTBOX_RETRY_DELAY = 30
+    settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+    return settings
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19Outbox:
+
+    def test_01_signup_enqueues_email(self, client, outbox_settings):
+        url = '/api/v1/auth/signup/'
+        response = client.post(url, data={
+            'username': 'new_user', 'email': 'new_user@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == 0, (
+            f'Проверьте, что при включённой очереди POST-запрос к `{url}` '
+            'не отправляет письмо в запросе.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.to == 'new_user@yamdb.fake' and email.sent_at is None
+
+        call_command('send_emails')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что команда `send_emails` отправляет письма из '
+            'очереди.'
+        )
+        assert mail.outbox[0].to == ['new_user@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None and email.attempts == 1
+
+        call_command('send_emails')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_retry_with_backoff(self, outbox_settings):
+        outbox_settings.EMAIL_BACKEND = f'{__name__}.FlakyBackend'
+        for address in ('first@yamdb.fake', 'fail@yamdb.fake',
+                        'second@yamdb.fake'):
+            enqueue_email('Тема', 'Текст', address)
+        FlakyBackend.opened = 0
+
+        assert send_pending() == (2, 1)
+        assert FlakyBackend.opened == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение.'
+        )
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            'first@yamdb.fake', 'second@yamdb.fake'
+        ]
+        failed = OutgoingEmail.objects.get(to='fail@yamdb.fake')
+        assert failed.sent_at is None and failed.attempts == 1
+        assert 'SMTPRecipientsRefused' in failed.last_error
+        delay = failed.send_after - timezone.now()
+        assert dt.timedelta(seconds=25) < delay <= dt.timedelta(seconds=30), (
+            'Проверьте, что неотправленное письмо откладывается на '
+            'EMAIL_OUTBOX_RETRY_DELAY секунд.'
+        )
+        assert send_pending() == (0, 0), (
+            'Проверьте, что отложенное письмо не отправляется раньше срока.'
+        )
+
+        OutgoingEmail.objects.filter(pk=failed.pk).update(
+            send_after=timezone.now()
+        )
+        assert send_pending() == (0, 1)
+        failed.refresh_from_db()
+        delay = failed.send_after - timezone.now()
+        assert dt.timedelta(seconds=55) < delay <= dt.timedelta(seconds=60), (
+            'Проверьте, что задержка удваивается с каждой попыткой.'
+        )
+        OutgoingEmail.objects.filter(pk=failed.pk).update(
+            send_after=timezone.now()
+        )
+        assert send_pending() == (0, 0), (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо '
+            'больше не отправляется.'
+        )
+
+    def test_03_send_outside_transaction(self, outbox_settings):
+        outbox_settings.EMAIL_BACKEND = f'{__name__}.FlakyBackend'
+        outbox_settings.EMAIL_OUTBOX_LEASE = 300
+        email = enqueue_email('Тема', 'Текст', 'first@yamdb.fake')
+        assert send_pending() == (1, 0)
+        assert FlakyBackend.in_transaction is False, (
+            'Проверьте, что письма отправляются вне транзакции.'
+        )
+        assert FlakyBackend.pending == 0, (
+            'Проверьте, что на время отправки письма пачки заняты и не '
+            'видны другим обработчикам.'
+        )
+        email.refresh_from_db()
+        assert email.sent_at is not None and email.attempts == 1
+
+        abandoned = enqueue_email('Тема', 'Текст', 'second@yamdb.fake')
+        OutgoingEmail.objects.filter(pk=abandoned.pk).update(
+            attempts=1, send_after=timezone.now() - dt.timedelta(seconds=1)
+        )
+        assert send_pending() == (1, 0), (
+            'Проверьте, что письмо, занятое упавшим обработчиком, '
+            'отправляется после истечения EMAIL_OUTBOX_LEASE.'
+        )
+
+    def test_04_purge_sent(self, outbox_settings):
+        outbox_settings.EMAIL_OUTBOX_RETENTION_DAYS = 30
+        for address in ('old@yamdb.fake', 'new@yamdb.fake',
+                        'pending@yamdb.fake'):
+            enqueue_email('Тема', 'Текст', address)
+        now = timezone.now()
+        OutgoingEmail.objects.filter(to='old@yamdb.fake').update(
+            sent_at=now - dt.timedelta(days=31)
+        )
+        OutgoingEmail.objects.filter(to='new@yamdb.fake').update(
+            sent_at=now - dt.timedelta(days=29)
+        )
+        assert purge_sent() == 1
+        assert sorted(
+            OutgoingEmail.objects.values_list('to', flat=True)
+        ) == ['new@yamdb.fake', 'pending@yamdb.fake'], (
+            'Проверьте, что удаляются только письма, отправленные раньше '
+            'EMAIL_OUTBOX_RETENTION_DAYS дней.'
+        )
@@ -1,5 +1,7 @@
 from http import HTTPStatus
 
+from reviews.models import Category, Genre, Review, Title
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +307,21 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def create_rated_titles(users, count):
+    category = Category.objects.create(name='Фильм', slug='films')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    titles = []
+    for idx in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        title.genre.add(genre)
+        for score_idx, author in enumerate(users):
+            Review.objects.create(
+                title=title, author=author, text='text',
+                score=score_idx % 10 + 1,
+            )
+        titles.append(title)
+    return titles